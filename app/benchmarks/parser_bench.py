@@ -0,0 +1,218 @@
+"""
+Golden-corpus benchmark for the signal parser.
+
+Replay (offline, no API key needed) - feeds recorded responses through the same decoding
+and validation as AIService.parse_signal, one column per file and per model/prompt in it.
+Without files it replays the baseline shipped next to the corpus:
+
+    python -m app.benchmarks.parser_bench replay
+    python -m app.benchmarks.parser_bench replay responses_a.jsonl responses_b.jsonl
+
+Live - calls OpenRouter for every corpus message, records the raw responses and reports
+latency per model:
+
+    python -m app.benchmarks.parser_bench live --models modelA,modelB --record responses.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+from typing import Dict, List, Optional
+from app.benchmarks.recorder import ResponseRecorder, load_responses
+from app.models.signal import TradeSignal
+from app.services.signal_decoder import decode_signal_response
+
+CORPUS_FILE = os.path.join(os.path.dirname(__file__), "data", "parser_corpus.jsonl")
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "data", "parser_responses_baseline.jsonl")
+FIELDS = ["symbol", "action", "order_type", "entry_range", "sl", "tp_list", "value"]
+FLOAT_TOLERANCE = 1e-6
+
+
+def load_corpus(path: str = CORPUS_FILE) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _normalize(field: str, value):
+    if field in ("entry_range", "tp_list"):
+        return sorted(float(v) for v in (value or []))
+    if field in ("sl", "value"):
+        return None if value is None else float(value)
+    return value
+
+
+def field_matches(field: str, expected, got) -> bool:
+    expected, got = _normalize(field, expected), _normalize(field, got)
+    if isinstance(expected, list):
+        return len(expected) == len(got) and all(abs(a - b) <= FLOAT_TOLERANCE for a, b in zip(expected, got))
+    if isinstance(expected, float) and isinstance(got, float):
+        return abs(expected - got) <= FLOAT_TOLERANCE
+    return expected == got
+
+
+def score(cases: List[dict], outputs: Dict[str, Optional[TradeSignal]]) -> dict:
+    """
+    Detection: signal vs null decided correctly. Field accuracy: over the cases that are
+    expected to be signals (a missed signal counts as every field wrong). Exact: the whole
+    output matches, null included. Cases without an output (not recorded) are skipped.
+    """
+    scored = [c for c in cases if c["id"] in outputs]
+    signals = [c for c in scored if c["expected"] is not None]
+    field_hits = {field: 0 for field in FIELDS}
+    detected = exact = 0
+
+    for case in scored:
+        expected = case["expected"]
+        got = outputs[case["id"]]
+        if (expected is None) == (got is None):
+            detected += 1
+        if expected is None:
+            exact += got is None
+            continue
+        if got is None:
+            continue
+
+        got = got.model_dump()
+        matches = [field_matches(field, expected.get(field), got.get(field)) for field in FIELDS]
+        for field, ok in zip(FIELDS, matches):
+            field_hits[field] += ok
+        exact += all(matches)
+
+    total = len(scored) or 1
+    result = {
+        "cases": len(scored),
+        "detection": detected / total,
+        "exact": exact / total,
+    }
+    for field in FIELDS:
+        result[field] = field_hits[field] / (len(signals) or 1)
+    return result
+
+
+def replay(cases: List[dict], responses: Dict[str, dict], repeats: int = 200) -> tuple:
+    """
+    Decodes the recorded responses for the corpus. Returns (outputs, responses per second).
+    """
+    recorded = [(c["id"], responses[c["text"]]["response"]) for c in cases if c["text"] in responses]
+    outputs = {case_id: decode_signal_response(response) for case_id, response in recorded}
+
+    if not recorded:
+        return outputs, 0.0
+
+    # Silence per-message logging while timing the decode path
+    decoder_logger = logging.getLogger("SignalDecoder")
+    level = decoder_logger.level
+    decoder_logger.setLevel(logging.CRITICAL)
+    try:
+        started = time.perf_counter()
+        for _ in range(repeats):
+            for _, response in recorded:
+                decode_signal_response(response)
+        elapsed = time.perf_counter() - started
+    finally:
+        decoder_logger.setLevel(level)
+
+    return outputs, (repeats * len(recorded)) / elapsed if elapsed > 0 else 0.0
+
+
+async def live(cases: List[dict], model: str, record_path: Optional[str]) -> tuple:
+    """
+    Runs the corpus through AIService with the given model. Returns (outputs, latencies in ms).
+    """
+    # Imported here: needs a configured .env (OpenRouter key), which replay mode does not
+    from app.services.ai_parser_svc import AIService
+
+    latencies = []
+
+    class _Capture(ResponseRecorder):
+        def record(self, text, model, system_prompt, response, latency_ms):
+            latencies.append(latency_ms)
+            if self.path:
+                super().record(text, model, system_prompt, response, latency_ms)
+
+    service = AIService(model_name=model, recorder=_Capture(record_path))
+    outputs = {}
+    for case in cases:
+        outputs[case["id"]] = await service.parse_signal(case["text"])
+    return outputs, latencies
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def print_table(results: Dict[str, dict]):
+    labels = list(results)
+    rows = ["cases", "detection", "exact"] + FIELDS + ["decode/s", "latency p50 ms", "latency p95 ms", "latency mean ms"]
+    width = max(18, *(len(label) + 2 for label in labels))
+
+    print("metric".ljust(18) + "".join(label.rjust(width) for label in labels))
+    for row in rows:
+        cells = []
+        for label in labels:
+            value = results[label].get(row)
+            if value is None:
+                cells.append("-".rjust(width))
+            elif row == "cases":
+                cells.append(str(value).rjust(width))
+            elif row in ["detection", "exact"] + FIELDS:
+                cells.append(f"{value * 100:.1f}%".rjust(width))
+            else:
+                cells.append(f"{value:.1f}".rjust(width))
+        print(row.ljust(18) + "".join(cells))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Golden-corpus benchmark for the signal parser.")
+    parser.add_argument("--corpus", default=CORPUS_FILE, help="JSONL corpus of messages and expected signals")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    replay_parser = sub.add_parser("replay", help="Score recorded responses offline")
+    replay_parser.add_argument("responses", nargs="*", default=[BASELINE_FILE],
+                               help="Recorded response files to compare side by side (default: the shipped baseline)")
+    replay_parser.add_argument("--repeats", type=int, default=200, help="Decode passes used to measure throughput")
+
+    live_parser = sub.add_parser("live", help="Call the model(s) and score the answers")
+    live_parser.add_argument("--models", default=None, help="Comma-separated models (default: OPENROUTER_MODEL)")
+    live_parser.add_argument("--record", default=None, help="Append raw responses to this file for later replay")
+
+    args = parser.parse_args(argv)
+    cases = load_corpus(args.corpus)
+    results = {}
+
+    if args.mode == "replay":
+        for path in args.responses:
+            runs = load_responses(path)
+            for (model, prompt), responses in runs.items():
+                outputs, throughput = replay(cases, responses, args.repeats)
+                result = score(cases, outputs)
+                result["decode/s"] = throughput
+                # One column per model/prompt when a file holds several runs
+                label = os.path.basename(path) if len(runs) == 1 else f"{os.path.basename(path)}:{model}@{prompt}"
+                results[label] = result
+    else:
+        if args.models:
+            models = [m.strip() for m in args.models.split(",") if m.strip()]
+        else:
+            from app.config import config
+            models = [config.OPENROUTER_MODEL]
+
+        for model in models:
+            outputs, latencies = asyncio.run(live(cases, model, args.record))
+            result = score(cases, outputs)
+            if latencies:
+                result["latency p50 ms"] = _percentile(latencies, 50)
+                result["latency p95 ms"] = _percentile(latencies, 95)
+                result["latency mean ms"] = statistics.fmean(latencies)
+            results[model] = result
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
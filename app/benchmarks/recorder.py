@@ -0,0 +1,49 @@
+import hashlib
+import json
+import time
+from typing import Dict, Optional, Tuple
+from app.log_setup import setup_logger
+
+logger = setup_logger("ResponseRecorder")
+
+def prompt_id(system_prompt: str) -> str:
+    """Short, stable id of a system prompt so runs with different prompts can be told apart."""
+    return hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+class ResponseRecorder:
+    """
+    Appends every raw LLM response to a JSONL file. Pass it to AIService(recorder=...)
+    in production to grow the corpus, or let the benchmark create one in live mode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def record(self, text: str, model: str, system_prompt: str, response: Optional[str], latency_ms: float):
+        record = {
+            "t": time.time(),
+            "model": model,
+            "prompt_id": prompt_id(system_prompt),
+            "text": text,
+            "response": response,
+            "latency_ms": round(latency_ms, 2),
+        }
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"Failed to record response: {e}")
+
+def load_responses(path: str) -> Dict[Tuple[str, str], Dict[str, dict]]:
+    """
+    Recorded responses grouped by run, (model, prompt_id), each keyed by message text
+    (the last recording of a text within a run wins).
+    """
+    runs = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                run = (record.get("model") or "?", record.get("prompt_id") or "?")
+                runs.setdefault(run, {})[record["text"]] = record
+    return runs
@@ -1,7 +1,9 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
+from app.models.paper import PaperSymbol
+from app.models.trailing import TrailingRule
 
 class Settings(BaseSettings):
     # Telegram
@@ -15,6 +17,15 @@ class Settings(BaseSettings):
     MT5_PASSWORD: str = Field(..., description="MT5 Password")
     MT5_SERVER: str = Field(..., description="MT5 Server Name")
     MT5_PATH: str = Field(r"C:\Program Files\MetaTrader 5\terminal64.exe", description="Path to MT5 terminal64.exe")
+
+    # Paper Trading
+    BROKER_MODE: Literal["live", "paper"] = Field("live", description="'paper' fills orders in an in-process simulator instead of the MT5 account")
+    PAPER_PRICE_SOURCE: Literal["auto", "terminal", "recorded"] = Field("auto", description="Paper prices: live terminal ticks, replayed PAPER_REPLAY_DIR ticks, or 'auto' (terminal if the MetaTrader5 package is installed)")
+    PAPER_REPLAY_DIR: str = Field("market_data", description="Recordings replayed by the 'recorded' price source (a live bot's RECORDER_DIR)")
+    PAPER_REPLAY_DAY: str = Field("", description="Recorded day (YYYY-MM-DD) to replay; '' = the latest one")
+    PAPER_REPLAY_SPEED: float = Field(1.0, gt=0, description="Replay speed of recorded ticks (2.0 = twice as fast as recorded)")
+    PAPER_BALANCE: float = Field(10000.0, description="Starting balance of the paper account")
+    PAPER_SYMBOLS: Dict[str, PaperSymbol] = Field(default_factory=lambda: {"XAUUSD": PaperSymbol()}, description='Symbol specs for replayed prices, as JSON, e.g. {"EURUSD": {"digits": 5, "point": 0.00001}}')
     
     # AI & Trading
     # CHANGE THESE FIELDS
@@ -23,6 +34,56 @@ class Settings(BaseSettings):
     OPENROUTER_MODEL: str = Field("tngtech/deepseek-r1t2-chimera:free", description="Model to use via OpenRouter...")
     # GEMINI_API_KEY: str = Field(..., description="Google Gemini API Key")
     FIXED_LOT_SIZE: float = Field(0.01, description="Fixed lot size for trades")
+
+    # Exposure Limits (0 = disabled)
+    MAX_LOTS_PER_SYMBOL: float = Field(0.0, description="Max gross lots (open + pending) per symbol")
+    MAX_NET_LOTS_PER_SYMBOL: float = Field(0.0, description="Max same-direction (net) lots per symbol")
+    MAX_LOTS_PER_GROUP: float = Field(0.0, description="Max gross lots (open + pending) per group/magic")
+    MAX_OPEN_FAMILIES: int = Field(0, description="Max signal families with open positions or pending orders")
+    MAX_RISK_AMOUNT: float = Field(0.0, description="Max total money at risk to SL across the account")
+
+    # Pending Orders
+    PENDING_ORDER_TTL_MINUTES: int = Field(240, description="Minutes a pending order may stay live before it is cancelled")
+    PENDING_ORDER_TTL_BY_MAGIC: Dict[int, int] = Field(default_factory=dict, description='Per-group TTL overrides in minutes as JSON, e.g. {"1001": 60}')
+    SESSION_CLOSE_UTC: Optional[str] = Field(None, description="UTC time (HH:MM) at which all pending orders are cancelled, e.g. 21:00. Unset = disabled")
+
+    # Deployment
+    PIPELINE_MODE: Literal["single", "multi"] = Field("single", description="'multi' runs ingestion, parsing and execution as separate processes")
+    PIPELINE_PARSER_ADDRESS: str = Field("tcp://127.0.0.1:8765", description="IPC address of the parser process (tcp://host:port or unix:///path)")
+    PIPELINE_EXECUTOR_ADDRESS: str = Field("tcp://127.0.0.1:8766", description="IPC address of the execution process (tcp://host:port or unix:///path)")
+    PIPELINE_INGESTION_ADDRESS: str = Field("tcp://127.0.0.1:8767", description="IPC address where ingestion receives acknowledgements from execution")
+    PIPELINE_ACK_TIMEOUT_SECONDS: float = Field(60.0, description="Resend a message to the parser if execution has not acknowledged it by then")
+    PIPELINE_PARSER_CONCURRENCY: int = Field(4, description="Messages parsed in parallel by the parser process (in order per chat)")
+
+    # Event-loop Watchdog & Profiler
+    LOOP_WATCHDOG_ENABLED: bool = Field(True, description="Measure event-loop lag and log the stack of code that blocks it")
+    LOOP_HEARTBEAT_MS: float = Field(100.0, description="Interval of the heartbeat used to measure loop lag")
+    LOOP_LAG_THRESHOLD_MS: float = Field(250.0, description="Loop stalls longer than this are logged with the blocking function")
+    LOOP_LAG_REPORT_SECONDS: float = Field(300.0, description="How often lag percentiles are logged (0 = never)")
+    PROFILER_ADDRESS: str = Field("tcp://127.0.0.1:8770", description="Local control endpoint of the profiler ('' = off). In multi mode each stage uses port + its index")
+    PROFILER_SAMPLE_MS: float = Field(5.0, description="Sampling interval of the on-demand profiler")
+    PROFILER_DEFAULT_SECONDS: float = Field(30.0, description="Profile length when triggered by SIGUSR1 or without a duration")
+    PROFILER_OUTPUT_DIR: str = Field("profiles", description="Where collapsed-stack (flamegraph) files are written")
+
+    # Signal Journal
+    JOURNAL_PATH: str = Field("signal_journal.jsonl", description="Append-only journal of messages, signals and order intents")
+    JOURNAL_FSYNC_INTERVAL_MS: int = Field(200, description="How often journal writes are fsynced to disk")
+    SIGNAL_MAX_AGE_SECONDS: float = Field(300, description="Messages older than this are not traded when replayed or caught up after a restart")
+    CATCHUP_LIMIT: int = Field(50, description="Max messages fetched per chat when catching up after a restart")
+
+    # Market / Execution Recorder
+    RECORDER_ENABLED: bool = Field(True, description="Record ticks and execution events to memory-mapped column files")
+    RECORDER_DIR: str = Field("market_data", description="Directory of the daily recorder files")
+    RECORD_SYMBOLS: List[str] = Field(default_factory=lambda: ["XAUUSD"], description='Symbols whose ticks are recorded, as JSON, e.g. ["XAUUSD", "EURUSD"]')
+    RECORDER_POLL_SECONDS: float = Field(1.0, description="How often new ticks are pulled from the terminal")
+
+    # Trailing Stops / Partial Closes
+    TRAILING_ENABLED: bool = Field(False, description="Run the tick-driven trailing-stop and partial-close engine")
+    TRAILING_DEFAULT_RULE: TrailingRule = Field(default_factory=TrailingRule, description="Rule (JSON) used for groups without an override")
+    TRAILING_RULES_BY_MAGIC: Dict[int, TrailingRule] = Field(default_factory=dict, description='Per-group rules as JSON, e.g. {"1001": {"trail_points": 200}}')
+    TRAILING_POLL_SECONDS: float = Field(0.5, description="How often ticks are polled for price updates")
+    TRAILING_REFRESH_SECONDS: float = Field(5.0, description="How often the open positions are reloaded into the engine")
+    TRAILING_MIN_SL_CHANGE_POINTS: float = Field(10.0, description="Only send an SL modification if it moves the SL by more than this")
     
     # Magic Map (could be loaded from file, but keeping simple for now)
     # We will load this from a separate JSON or keep it here if static enough.
@@ -39,6 +100,16 @@ class Settings(BaseSettings):
             return [g.strip() for g in v.split(',') if g.strip()]
         return v
 
+    @field_validator("SESSION_CLOSE_UTC", mode="before")
+    @classmethod
+    def parse_session_close(cls, v):
+        if v is None or (isinstance(v, str) and not v.strip()):
+            return None
+        hours, minutes = str(v).strip().split(":")
+        if not (0 <= int(hours) < 24 and 0 <= int(minutes) < 60):
+            raise ValueError(f"Invalid session close time: {v}")
+        return f"{int(hours):02d}:{int(minutes):02d}"
+
 # Global instance
 try:
     config = Settings()
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+
+class PaperSymbol(BaseModel):
+    """
+    Contract specification of a symbol simulated by the paper broker when prices are
+    replayed from recordings (with a live terminal its own symbol_info is used).
+    """
+    digits: int = Field(default=2, ge=0, description="Price decimals")
+    point: float = Field(default=0.01, gt=0, description="Smallest price change")
+    trade_tick_size: float = Field(default=0.01, gt=0, description="Price change of one tick")
+    trade_tick_value: float = Field(default=1.0, gt=0, description="Account currency per tick per lot")
+    trade_contract_size: float = Field(default=100.0, gt=0, description="Units per lot")
+    volume_min: float = Field(default=0.01, gt=0)
+    volume_max: float = Field(default=100.0, gt=0)
+    volume_step: float = Field(default=0.01, gt=0)
+    trade_stops_level: int = Field(default=0, ge=0, description="Minimum SL/TP/pending distance from price, in points")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "digits": 5,
+                "point": 0.00001,
+                "trade_tick_size": 0.00001,
+                "trade_tick_value": 1.0,
+                "trade_contract_size": 100000,
+                "trade_stops_level": 10
+            }
+        }
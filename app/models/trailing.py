@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+
+class TrailingRule(BaseModel):
+    """
+    Trailing-stop / partial-close rule applied to every position of a signal family.
+    All distances are in points (symbol_info.point) so one rule works across symbols.
+    """
+    activation_points: float = Field(default=0.0, ge=0, description="Profit in points before the trail starts moving the SL")
+    trail_points: float = Field(default=0.0, ge=0, description="Distance of the SL behind price. 0 disables trailing")
+    step_points: float = Field(default=0.0, ge=0, description="Move the SL only in multiples of this step (step-trail). 0 = continuous")
+    partial_close_points: float = Field(default=0.0, ge=0, description="Profit in points at which part of the position is closed. 0 disables")
+    partial_close_fraction: float = Field(default=0.5, gt=0, le=1, description="Fraction of the volume closed by the partial close")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "activation_points": 300,
+                "trail_points": 200,
+                "step_points": 50,
+                "partial_close_points": 500,
+                "partial_close_fraction": 0.5
+            }
+        }
@@ -0,0 +1,72 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import List, Tuple
+
+# What a trigger entry refers to
+ENTRY_ORDER = 0  # pending order activation
+ENTRY_SL = 1     # position stop loss
+ENTRY_TP = 2     # position take profit
+
+
+class PriceLevelIndex:
+    """
+    Trigger prices kept sorted, each with a (kind, ticket) key. A "rising" index fires
+    every level the price has reached from below (price >= level), a "falling" one every
+    level reached from above (price <= level). The fired levels are always one end of
+    the list, so a tick costs one comparison when nothing triggers and a bisect when
+    something does, however many levels are resting.
+    """
+
+    def __init__(self, rising: bool):
+        self.rising = rising
+        self._entries: List[Tuple[float, int, int]] = []  # (price, kind, ticket)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, price: float, kind: int, ticket: int):
+        insort(self._entries, (price, kind, ticket))
+
+    def remove(self, price: float, kind: int, ticket: int) -> bool:
+        entry = (price, kind, ticket)
+        i = bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            del self._entries[i]
+            return True
+        return False
+
+    def pop_reached(self, price: float) -> List[Tuple[float, int, int]]:
+        entries = self._entries
+        if not entries:
+            return []
+        if self.rising:
+            if entries[0][0] > price:
+                return []
+            i = bisect_right(entries, (price, ENTRY_TP + 1))
+            fired = entries[:i]
+            del entries[:i]
+        else:
+            if entries[-1][0] < price:
+                return []
+            i = bisect_left(entries, (price, ENTRY_ORDER))
+            fired = entries[i:]
+            del entries[i:]
+        return fired
+
+
+class SymbolBook:
+    """The four trigger indexes of a symbol, by the price side and direction that fires them."""
+
+    def __init__(self):
+        self.ask_rising = PriceLevelIndex(rising=True)    # BUY_STOP entries, SL of sells
+        self.ask_falling = PriceLevelIndex(rising=False)  # BUY_LIMIT entries, TP of sells
+        self.bid_rising = PriceLevelIndex(rising=True)    # SELL_LIMIT entries, TP of buys
+        self.bid_falling = PriceLevelIndex(rising=False)  # SELL_STOP entries, SL of buys
+
+    def __len__(self):
+        return len(self.ask_rising) + len(self.ask_falling) + len(self.bid_rising) + len(self.bid_falling)
+
+    def pop_reached(self, bid: float, ask: float) -> List[Tuple[float, int, int]]:
+        return (
+            self.ask_rising.pop_reached(ask) + self.ask_falling.pop_reached(ask)
+            + self.bid_rising.pop_reached(bid) + self.bid_falling.pop_reached(bid)
+        )
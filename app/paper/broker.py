@@ -0,0 +1,636 @@
+import itertools
+import time
+from collections import deque
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from app.config import config
+from app.log_setup import setup_logger
+from app.paper.book import ENTRY_ORDER, ENTRY_SL, ENTRY_TP, SymbolBook
+from app.paper.constants import MT5Constants
+from app.paper.feeds import RecordedTickFeed, create_feed
+
+logger = setup_logger("PaperBroker")
+
+EPSILON = 1e-9
+COMMENT_LIMIT = 31
+TICK_HISTORY = 10_000
+TICK_DTYPE = np.dtype([
+    ("time", np.int64), ("bid", np.float64), ("ask", np.float64), ("last", np.float64),
+    ("volume", np.uint64), ("time_msc", np.int64), ("flags", np.uint32), ("volume_real", np.float64),
+])
+
+
+# =====================================================================================
+# 📦 MT5-SHAPED RECORDS
+# =====================================================================================
+class Tick(NamedTuple):
+    time: int
+    bid: float
+    ask: float
+    last: float
+    volume: int
+    time_msc: int
+    flags: int
+    volume_real: float
+
+
+class SymbolInfo(NamedTuple):
+    name: str
+    visible: bool
+    digits: int
+    point: float
+    spread: int
+    trade_stops_level: int
+    trade_tick_size: float
+    trade_tick_value: float
+    trade_contract_size: float
+    volume_min: float
+    volume_max: float
+    volume_step: float
+    bid: float
+    ask: float
+
+
+class AccountInfo(NamedTuple):
+    login: int
+    server: str
+    currency: str
+    balance: float
+    equity: float
+    profit: float
+
+
+class OrderSendResult(NamedTuple):
+    retcode: int
+    deal: int
+    order: int
+    volume: float
+    price: float
+    bid: float
+    ask: float
+    comment: str
+    request_id: int
+    retcode_external: int
+    request: dict
+
+
+@dataclass
+class TradeOrder:
+    ticket: int
+    time_setup: int
+    time_setup_msc: int
+    time_done: int
+    time_done_msc: int
+    type: int
+    type_time: int
+    type_filling: int
+    state: int
+    magic: int
+    position_id: int
+    volume_initial: float
+    volume_current: float
+    price_open: float
+    sl: float
+    tp: float
+    price_current: float
+    symbol: str
+    comment: str
+
+
+@dataclass
+class TradePosition:
+    ticket: int
+    time: int
+    time_msc: int
+    type: int
+    magic: int
+    identifier: int
+    volume: float
+    price_open: float
+    sl: float
+    tp: float
+    price_current: float
+    swap: float
+    profit: float
+    symbol: str
+    comment: str
+
+
+@dataclass
+class TradeDeal:
+    ticket: int
+    order: int
+    time: int
+    time_msc: int
+    type: int
+    entry: int
+    magic: int
+    position_id: int
+    reason: int
+    volume: float
+    price: float
+    commission: float
+    swap: float
+    profit: float
+    symbol: str
+    comment: str
+
+
+def _timestamp(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+class PaperBroker(MT5Constants):
+    """
+    In-process stand-in for the MetaTrader5 package: same functions, constants and result
+    shapes, with orders filled against a tick feed instead of a broker. Pending orders and
+    SL/TP levels rest in sorted per-symbol price indexes (app.paper.book), so the work per
+    tick depends on what triggers, not on how many orders and positions are open.
+
+    Every call first processes the ticks that arrived since the previous call, so the
+    account is always up to date without a background task. Deals are stamped with the
+    local time they were matched at, like the monitor's history windows expect.
+    """
+
+    BUY_TYPES = {MT5Constants.ORDER_TYPE_BUY, MT5Constants.ORDER_TYPE_BUY_LIMIT, MT5Constants.ORDER_TYPE_BUY_STOP}
+    PENDING_TYPES = {
+        MT5Constants.ORDER_TYPE_BUY_LIMIT, MT5Constants.ORDER_TYPE_SELL_LIMIT,
+        MT5Constants.ORDER_TYPE_BUY_STOP, MT5Constants.ORDER_TYPE_SELL_STOP,
+    }
+
+    def __init__(self, feed=None):
+        self.feed = feed
+        self.initialized = False
+        self.balance = config.PAPER_BALANCE
+        self._error = (1, "Success")
+
+        self._tickets = itertools.count(1_000_001)  # orders and positions (a position keeps its order's ticket)
+        self._deal_tickets = itertools.count(5_000_001)
+        self._request_ids = itertools.count(1)
+
+        self._symbols: Dict[str, SymbolInfo] = {}
+        self._ticks: Dict[str, Tick] = {}
+        self._tick_history: Dict[str, deque] = {}
+        self._books: Dict[str, SymbolBook] = {}
+
+        self._orders: Dict[int, TradeOrder] = {}
+        self._positions: Dict[int, TradePosition] = {}
+        self._history_orders: List[TradeOrder] = []
+        self._history_order_times: List[int] = []
+        self._deals: List[TradeDeal] = []
+        self._deal_times: List[int] = []
+
+    # =====================================================================================
+    # 🔌 TERMINAL
+    # =====================================================================================
+    def initialize(self, *args, **kwargs) -> bool:
+        if self.initialized:
+            return True
+        self.feed = self.feed or create_feed()
+        if not self.feed.start():
+            self._error = (-10003, "Paper price feed failed to start")
+            return False
+        self.initialized = True
+        logger.info(f"Paper broker ready (balance {self.balance:.2f}).")
+        return True
+
+    @property
+    def replaying(self) -> bool:
+        """True when prices come from recordings rather than a live terminal."""
+        return isinstance(self.feed, RecordedTickFeed)
+
+    def login(self, *args, **kwargs) -> bool:
+        return self.initialized
+
+    def shutdown(self):
+        if self.initialized and hasattr(self.feed, "shutdown"):
+            self.feed.shutdown()
+        self.initialized = False
+
+    def last_error(self):
+        return self._error
+
+    def account_info(self) -> Optional[AccountInfo]:
+        if not self.initialized:
+            return None
+        self._advance()
+        profit = sum(self._profit(p, self._close_price(p)) for p in self._positions.values())
+        return AccountInfo(config.MT5_LOGIN, "Paper", "USD", self.balance, self.balance + profit, profit)
+
+    # =====================================================================================
+    # 📈 SYMBOLS & TICKS
+    # =====================================================================================
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        info = self._symbol(symbol)
+        if info is None:
+            return None
+        self._advance()
+        tick = self._ticks.get(symbol)
+        if tick:
+            spread = int(round((tick.ask - tick.bid) / info.point))
+            info = info._replace(bid=tick.bid, ask=tick.ask, spread=spread)
+        return info
+
+    def symbol_select(self, symbol: str, enable: bool = True) -> bool:
+        return self._symbol(symbol) is not None
+
+    def symbol_info_tick(self, symbol: str) -> Optional[Tick]:
+        self._symbol(symbol)
+        self._advance()
+        return self._ticks.get(symbol)
+
+    def copy_ticks_from(self, symbol: str, date_from, count: int, flags: int = MT5Constants.COPY_TICKS_ALL):
+        self._symbol(symbol)
+        self._advance()
+        from_msc = int(_timestamp(date_from) * 1000)
+        ticks = [t for t in self._tick_history.get(symbol, ()) if t.time_msc >= from_msc][:count]
+        return np.array([tuple(t) for t in ticks], dtype=TICK_DTYPE)
+
+    def _symbol(self, symbol: str) -> Optional[SymbolInfo]:
+        info = self._symbols.get(symbol)
+        if info is not None:
+            return info
+
+        spec = config.PAPER_SYMBOLS.get(symbol)
+        terminal_info = self.feed.symbol_info(symbol) if self.initialized else None
+        if terminal_info is not None:
+            info = SymbolInfo(
+                symbol, True, terminal_info.digits, terminal_info.point, terminal_info.spread,
+                terminal_info.trade_stops_level, terminal_info.trade_tick_size, terminal_info.trade_tick_value,
+                terminal_info.trade_contract_size, terminal_info.volume_min, terminal_info.volume_max,
+                terminal_info.volume_step, terminal_info.bid, terminal_info.ask,
+            )
+        elif spec is not None:
+            info = SymbolInfo(
+                symbol, True, spec.digits, spec.point, 0, spec.trade_stops_level, spec.trade_tick_size,
+                spec.trade_tick_value, spec.trade_contract_size, spec.volume_min, spec.volume_max,
+                spec.volume_step, 0.0, 0.0,
+            )
+        else:
+            self._error = (-1, f"Unknown symbol {symbol}")
+            return None
+
+        self._symbols[symbol] = info
+        self._books[symbol] = SymbolBook()
+        self._tick_history[symbol] = deque(maxlen=TICK_HISTORY)
+        return info
+
+    # =====================================================================================
+    # ⚡ MATCHING
+    # =====================================================================================
+    def _advance(self):
+        if not self.initialized:
+            return
+        for symbol, time_msc, bid, ask in self.feed.poll(list(self._symbols)):
+            if symbol not in self._symbols and self._symbol(symbol) is None:
+                continue
+            self.on_tick(symbol, time_msc, bid, ask)
+
+    def on_tick(self, symbol: str, time_msc: int, bid: float, ask: float):
+        tick = Tick(time_msc // 1000, bid, ask, 0.0, 0, time_msc, 0, 0.0)
+        self._ticks[symbol] = tick
+        self._tick_history[symbol].append(tick)
+
+        book = self._books[symbol]
+        if not len(book):
+            return
+        for _, kind, ticket in book.pop_reached(bid, ask):
+            if kind == ENTRY_ORDER:
+                order = self._orders.get(ticket)
+                if order is not None:
+                    self._fill_pending(order, tick)
+            else:
+                position = self._positions.get(ticket)
+                if position is not None:
+                    reason = self.DEAL_REASON_SL if kind == ENTRY_SL else self.DEAL_REASON_TP
+                    self._close(position, position.volume, tick, reason, position.comment)
+
+    def _index_order(self, order: TradeOrder, add: bool = True):
+        book = self._books[order.symbol]
+        index = {
+            self.ORDER_TYPE_BUY_LIMIT: book.ask_falling,
+            self.ORDER_TYPE_BUY_STOP: book.ask_rising,
+            self.ORDER_TYPE_SELL_LIMIT: book.bid_rising,
+            self.ORDER_TYPE_SELL_STOP: book.bid_falling,
+        }[order.type]
+        if add:
+            index.add(order.price_open, ENTRY_ORDER, order.ticket)
+        else:
+            index.remove(order.price_open, ENTRY_ORDER, order.ticket)
+
+    def _index_position(self, position: TradePosition, add: bool = True):
+        # A buy closes at the bid, a sell at the ask
+        book = self._books[position.symbol]
+        if position.type == self.POSITION_TYPE_BUY:
+            sl_index, tp_index = book.bid_falling, book.bid_rising
+        else:
+            sl_index, tp_index = book.ask_rising, book.ask_falling
+        for index, level, kind in ((sl_index, position.sl, ENTRY_SL), (tp_index, position.tp, ENTRY_TP)):
+            if not level:
+                continue
+            if add:
+                index.add(level, kind, position.ticket)
+            else:
+                index.remove(level, kind, position.ticket)
+
+    # =====================================================================================
+    # 💼 ACCOUNT STATE CHANGES
+    # =====================================================================================
+    def _now(self):
+        now_msc = time.time_ns() // 1_000_000
+        return now_msc // 1000, now_msc
+
+    def _archive_order(self, order: TradeOrder, state: int):
+        order.time_done, order.time_done_msc = self._now()
+        order.state = state
+        self._history_orders.append(order)
+        self._history_order_times.append(order.time_setup_msc)
+
+    def _add_deal(self, order_ticket: int, position: TradePosition, deal_type: int, entry: int, reason: int,
+                  volume: float, price: float, profit: float, comment: str) -> TradeDeal:
+        now, now_msc = self._now()
+        deal = TradeDeal(
+            next(self._deal_tickets), order_ticket, now, now_msc, deal_type, entry, position.magic,
+            position.ticket, reason, volume, price, 0.0, 0.0, profit, position.symbol, comment,
+        )
+        self._deals.append(deal)
+        self._deal_times.append(now_msc)
+        return deal
+
+    def _open(self, order: TradeOrder, tick: Tick) -> TradeDeal:
+        is_buy = order.type in self.BUY_TYPES
+        price = tick.ask if is_buy else tick.bid
+        now, now_msc = self._now()
+        position = TradePosition(
+            order.ticket, now, now_msc, self.POSITION_TYPE_BUY if is_buy else self.POSITION_TYPE_SELL,
+            order.magic, order.ticket, order.volume_initial, price, order.sl, order.tp, price, 0.0, 0.0,
+            order.symbol, order.comment,
+        )
+        self._positions[position.ticket] = position
+        self._index_position(position)
+
+        order.position_id = position.ticket
+        order.volume_current = 0.0
+        order.price_current = price
+        self._archive_order(order, self.ORDER_STATE_FILLED)
+        deal_type = self.DEAL_TYPE_BUY if is_buy else self.DEAL_TYPE_SELL
+        return self._add_deal(order.ticket, position, deal_type, self.DEAL_ENTRY_IN, self.DEAL_REASON_EXPERT,
+                              position.volume, price, 0.0, order.comment)
+
+    def _fill_pending(self, order: TradeOrder, tick: Tick):
+        del self._orders[order.ticket]
+        deal = self._open(order, tick)
+        logger.info(f"Pending #{order.ticket} {order.symbol} filled at {deal.price}")
+
+    def _close(self, position: TradePosition, volume: float, tick: Tick, reason: int, comment: str,
+               order_ticket: Optional[int] = None) -> TradeDeal:
+        price = self._close_price(position, tick)
+        profit = self._profit(position, price, volume)
+        self.balance += profit
+
+        self._index_position(position, add=False)
+        position.volume = round(position.volume - volume, 8)
+        if position.volume > EPSILON:
+            self._index_position(position)
+        else:
+            del self._positions[position.ticket]
+
+        deal_type = self.DEAL_TYPE_SELL if position.type == self.POSITION_TYPE_BUY else self.DEAL_TYPE_BUY
+        deal = self._add_deal(order_ticket or next(self._tickets), position, deal_type, self.DEAL_ENTRY_OUT,
+                              reason, volume, price, profit, comment)
+        if reason in (self.DEAL_REASON_SL, self.DEAL_REASON_TP):
+            label = "SL" if reason == self.DEAL_REASON_SL else "TP"
+            logger.info(f"Position #{position.ticket} {position.symbol} closed by {label} at {price} ({profit:+.2f})")
+        return deal
+
+    def _close_price(self, position: TradePosition, tick: Optional[Tick] = None) -> float:
+        tick = tick or self._ticks.get(position.symbol)
+        if tick is None:
+            return position.price_open
+        return tick.bid if position.type == self.POSITION_TYPE_BUY else tick.ask
+
+    def _profit(self, position: TradePosition, price: float, volume: Optional[float] = None) -> float:
+        info = self._symbols[position.symbol]
+        direction = 1 if position.type == self.POSITION_TYPE_BUY else -1
+        volume = position.volume if volume is None else volume
+        return (price - position.price_open) * direction * volume * info.trade_tick_value / info.trade_tick_size
+
+    # =====================================================================================
+    # 📤 ORDER SEND
+    # =====================================================================================
+    def order_send(self, request: dict) -> Optional[OrderSendResult]:
+        if not self.initialized:
+            self._error = (-10004, "No IPC connection")
+            return None
+        self._advance()
+
+        action = request.get("action")
+        handler = {
+            self.TRADE_ACTION_DEAL: self._send_deal,
+            self.TRADE_ACTION_PENDING: self._send_pending,
+            self.TRADE_ACTION_SLTP: self._send_sltp,
+            self.TRADE_ACTION_MODIFY: self._send_modify,
+            self.TRADE_ACTION_REMOVE: self._send_remove,
+        }.get(action)
+        if handler is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, "Unsupported trade action")
+        return handler(request)
+
+    def _result(self, request: dict, retcode: int, comment: str, order: int = 0, deal: int = 0,
+                volume: float = 0.0, price: float = 0.0, tick: Optional[Tick] = None) -> OrderSendResult:
+        return OrderSendResult(
+            retcode, deal, order, volume, price, tick.bid if tick else 0.0, tick.ask if tick else 0.0,
+            comment, next(self._request_ids), 0, dict(request),
+        )
+
+    def _check_volume(self, info: SymbolInfo, volume: float) -> bool:
+        if volume < info.volume_min - EPSILON or volume > info.volume_max + EPSILON:
+            return False
+        steps = volume / info.volume_step
+        return abs(steps - round(steps)) < 1e-6
+
+    def _check_stops(self, info: SymbolInfo, is_buy: bool, reference: float, sl: float, tp: float) -> bool:
+        """SL/TP on the right side of `reference` and at least trade_stops_level points away."""
+        gap = info.trade_stops_level * info.point
+        direction = 1 if is_buy else -1
+        if sl and (reference - sl) * direction < gap - EPSILON:
+            return False
+        if tp and (tp - reference) * direction < gap - EPSILON:
+            return False
+        return True
+
+    def _new_order(self, request: dict, info: SymbolInfo, order_type: int, price: float) -> TradeOrder:
+        now, now_msc = self._now()
+        return TradeOrder(
+            next(self._tickets), now, now_msc, 0, 0, order_type,
+            request.get("type_time", self.ORDER_TIME_GTC), request.get("type_filling", self.ORDER_FILLING_FOK),
+            self.ORDER_STATE_PLACED, int(request.get("magic", 0)), 0, float(request["volume"]),
+            float(request["volume"]), price, float(request.get("sl") or 0.0), float(request.get("tp") or 0.0),
+            price, info.name, str(request.get("comment", ""))[:COMMENT_LIMIT],
+        )
+
+    def _send_deal(self, request: dict) -> OrderSendResult:
+        info = self._symbol(request.get("symbol", ""))
+        if info is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, "Unknown symbol")
+        tick = self._ticks.get(info.name)
+        if tick is None:
+            return self._result(request, self.TRADE_RETCODE_PRICE_OFF, "No prices")
+
+        volume = float(request.get("volume", 0.0))
+        if not self._check_volume(info, volume):
+            return self._result(request, self.TRADE_RETCODE_INVALID_VOLUME, "Invalid volume", tick=tick)
+        is_buy = request.get("type") == self.ORDER_TYPE_BUY
+
+        if request.get("position"):
+            # Closing (part of) a position
+            position = self._positions.get(request["position"])
+            if position is None:
+                return self._result(request, self.TRADE_RETCODE_POSITION_CLOSED, "Position doesn't exist", tick=tick)
+            if is_buy == (position.type == self.POSITION_TYPE_BUY) or volume > position.volume + EPSILON:
+                return self._result(request, self.TRADE_RETCODE_INVALID, "Invalid request", tick=tick)
+            order_ticket = next(self._tickets)
+            deal = self._close(position, min(volume, position.volume), tick, self.DEAL_REASON_EXPERT,
+                               str(request.get("comment", ""))[:COMMENT_LIMIT], order_ticket)
+            return self._result(request, self.TRADE_RETCODE_DONE, "Request executed", order_ticket, deal.ticket,
+                                deal.volume, deal.price, tick)
+
+        market = tick.ask if is_buy else tick.bid
+        if not self._check_stops(info, is_buy, tick.bid if is_buy else tick.ask,
+                                 float(request.get("sl") or 0.0), float(request.get("tp") or 0.0)):
+            return self._result(request, self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops", tick=tick)
+
+        order = self._new_order(request, info, self.ORDER_TYPE_BUY if is_buy else self.ORDER_TYPE_SELL, market)
+        deal = self._open(order, tick)
+        return self._result(request, self.TRADE_RETCODE_DONE, "Request executed", order.ticket, deal.ticket,
+                            deal.volume, deal.price, tick)
+
+    def _valid_pending_price(self, info: SymbolInfo, order_type: int, price: float, tick: Tick) -> bool:
+        gap = info.trade_stops_level * info.point - EPSILON
+        if order_type == self.ORDER_TYPE_BUY_LIMIT:
+            return tick.ask - price >= gap
+        if order_type == self.ORDER_TYPE_BUY_STOP:
+            return price - tick.ask >= gap
+        if order_type == self.ORDER_TYPE_SELL_LIMIT:
+            return price - tick.bid >= gap
+        return tick.bid - price >= gap
+
+    def _send_pending(self, request: dict) -> OrderSendResult:
+        info = self._symbol(request.get("symbol", ""))
+        if info is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, "Unknown symbol")
+        tick = self._ticks.get(info.name)
+        if tick is None:
+            return self._result(request, self.TRADE_RETCODE_PRICE_OFF, "No prices")
+
+        order_type = request.get("type")
+        if order_type not in self.PENDING_TYPES:
+            return self._result(request, self.TRADE_RETCODE_INVALID, "Invalid order type", tick=tick)
+        volume = float(request.get("volume", 0.0))
+        if not self._check_volume(info, volume):
+            return self._result(request, self.TRADE_RETCODE_INVALID_VOLUME, "Invalid volume", tick=tick)
+        price = float(request.get("price", 0.0))
+        if not self._valid_pending_price(info, order_type, price, tick):
+            return self._result(request, self.TRADE_RETCODE_INVALID_PRICE, "Invalid price", tick=tick)
+        if not self._check_stops(info, order_type in self.BUY_TYPES, price,
+                                 float(request.get("sl") or 0.0), float(request.get("tp") or 0.0)):
+            return self._result(request, self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops", tick=tick)
+
+        order = self._new_order(request, info, order_type, price)
+        self._orders[order.ticket] = order
+        self._index_order(order)
+        return self._result(request, self.TRADE_RETCODE_DONE, "Request executed", order.ticket,
+                            volume=volume, price=price, tick=tick)
+
+    def _send_sltp(self, request: dict) -> OrderSendResult:
+        position = self._positions.get(request.get("position"))
+        if position is None:
+            return self._result(request, self.TRADE_RETCODE_POSITION_CLOSED, "Position doesn't exist")
+        info = self._symbols[position.symbol]
+        tick = self._ticks[position.symbol]
+        sl, tp = float(request.get("sl") or 0.0), float(request.get("tp") or 0.0)
+        is_buy = position.type == self.POSITION_TYPE_BUY
+        if not self._check_stops(info, is_buy, tick.bid if is_buy else tick.ask, sl, tp):
+            return self._result(request, self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops", tick=tick)
+
+        self._index_position(position, add=False)
+        position.sl, position.tp = sl, tp
+        self._index_position(position)
+        return self._result(request, self.TRADE_RETCODE_DONE, "Request executed", position.ticket, tick=tick)
+
+    def _send_modify(self, request: dict) -> OrderSendResult:
+        order = self._orders.get(request.get("order"))
+        if order is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, "Order doesn't exist")
+        info = self._symbols[order.symbol]
+        tick = self._ticks[order.symbol]
+        price = float(request.get("price") or order.price_open)
+        sl, tp = float(request.get("sl") or 0.0), float(request.get("tp") or 0.0)
+        if not self._valid_pending_price(info, order.type, price, tick):
+            return self._result(request, self.TRADE_RETCODE_INVALID_PRICE, "Invalid price", tick=tick)
+        if not self._check_stops(info, order.type in self.BUY_TYPES, price, sl, tp):
+            return self._result(request, self.TRADE_RETCODE_INVALID_STOPS, "Invalid stops", tick=tick)
+
+        self._index_order(order, add=False)
+        order.price_open, order.sl, order.tp = price, sl, tp
+        self._index_order(order)
+        return self._result(request, self.TRADE_RETCODE_DONE, "Request executed", order.ticket, tick=tick)
+
+    def _send_remove(self, request: dict) -> OrderSendResult:
+        order = self._orders.pop(request.get("order"), None)
+        if order is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, "Order doesn't exist")
+        self._index_order(order, add=False)
+        self._archive_order(order, self.ORDER_STATE_CANCELED)
+        return self._result(request, self.TRADE_RETCODE_DONE, "Request executed", order.ticket)
+
+    # =====================================================================================
+    # 📋 QUERIES
+    # =====================================================================================
+    def positions_get(self, symbol: str = None, ticket: int = None, **kwargs):
+        self._advance()
+        if ticket is not None:
+            positions = [self._positions[ticket]] if ticket in self._positions else []
+        else:
+            positions = [p for p in self._positions.values() if symbol is None or p.symbol == symbol]
+
+        snapshots = []
+        for p in positions:
+            price = self._close_price(p)
+            snapshots.append(replace(p, price_current=price, profit=self._profit(p, price)))
+        return tuple(snapshots)
+
+    def positions_total(self) -> int:
+        self._advance()
+        return len(self._positions)
+
+    def orders_get(self, symbol: str = None, ticket: int = None, **kwargs):
+        self._advance()
+        if ticket is not None:
+            return (replace(self._orders[ticket]),) if ticket in self._orders else ()
+        return tuple(replace(o) for o in self._orders.values() if symbol is None or o.symbol == symbol)
+
+    def orders_total(self) -> int:
+        self._advance()
+        return len(self._orders)
+
+    def history_deals_get(self, date_from, date_to, **kwargs):
+        self._advance()
+        start = bisect_left(self._deal_times, int(_timestamp(date_from) * 1000))
+        end = bisect_right(self._deal_times, int(_timestamp(date_to) * 1000))
+        return tuple(replace(d) for d in self._deals[start:end])
+
+    def history_orders_get(self, date_from, date_to, **kwargs):
+        self._advance()
+        start_msc, end_msc = int(_timestamp(date_from) * 1000), int(_timestamp(date_to) * 1000)
+        # Archived in completion order: filter on the setup time like MT5 does
+        return tuple(
+            replace(o) for o, setup_msc in zip(self._history_orders, self._history_order_times)
+            if start_msc <= setup_msc <= end_msc
+        )
+
+
+paper_broker = PaperBroker()
@@ -0,0 +1,144 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional, Tuple
+import numpy as np
+from app.config import config
+from app.log_setup import setup_logger
+from app.services.recorder_svc import read_day
+
+logger = setup_logger("PaperFeed")
+
+# (symbol, time_msc, bid, ask)
+RawTick = Tuple[str, int, float, float]
+
+MAX_TICKS_PER_PULL = 100_000
+
+
+class RecordedTickFeed:
+    """
+    Replays a day recorded by MarketRecorder in real time (scaled by `speed`). Tick times
+    are shifted so the replay looks live: the first tick is stamped with the start time.
+    """
+
+    def __init__(self, base_dir: str, day: str = "", speed: float = 1.0):
+        self.base_dir = base_dir
+        self.day = day or self._latest_day(base_dir)
+        self.speed = speed
+        self.time_msc = np.zeros(0, dtype=np.int64)
+        self.symbol_ids = np.zeros(0, dtype=np.uint16)
+        self.bid = np.zeros(0)
+        self.ask = np.zeros(0)
+        self.symbols = []
+        self._started_msc = None
+        self._next = 0
+
+    @staticmethod
+    def _latest_day(base_dir: str) -> str:
+        days = sorted(
+            d for d in (os.listdir(base_dir) if os.path.isdir(base_dir) else [])
+            if os.path.isdir(os.path.join(base_dir, d, "ticks"))
+        )
+        return days[-1] if days else ""
+
+    def start(self) -> bool:
+        if not self.day:
+            logger.error(f"No recorded ticks found in {self.base_dir}.")
+            return False
+        columns = read_day(self.base_dir, self.day, "ticks")
+        # Copy out of the memory maps: the recorder may still be appending to this day
+        self.time_msc = np.array(columns["time_msc"])
+        self.symbol_ids = np.array(columns["symbol"])
+        self.bid = np.array(columns["bid"])
+        self.ask = np.array(columns["ask"])
+        self.symbols = [str(s) for s in columns["symbols"]]
+        self._started_msc = time.time_ns() // 1_000_000
+        self._next = 0
+        logger.info(f"Replaying {len(self.time_msc)} ticks of {self.day} at {self.speed:g}x")
+        return len(self.time_msc) > 0
+
+    def symbol_info(self, symbol: str):
+        return None
+
+    def poll(self, symbols: Iterable[str]) -> Iterator[RawTick]:
+        if self._started_msc is None or self._next >= len(self.time_msc):
+            return
+        now_msc = time.time_ns() // 1_000_000
+        first_msc = int(self.time_msc[0])
+        due_msc = first_msc + int((now_msc - self._started_msc) * self.speed)
+        end = int(np.searchsorted(self.time_msc, due_msc, side="right"))
+
+        for i in range(self._next, end):
+            stamped = self._started_msc + int((int(self.time_msc[i]) - first_msc) / self.speed)
+            yield self.symbols[self.symbol_ids[i]], stamped, float(self.bid[i]), float(self.ask[i])
+        self._next = end
+
+        if self._next >= len(self.time_msc):
+            logger.warning(f"Replay of {self.day} finished: prices are frozen from now on.")
+
+
+class TerminalTickFeed:
+    """
+    Live prices and symbol specs from a real MT5 terminal; orders never reach it.
+    Every tick since the previous poll is pulled (copy_ticks_from) so no trigger is skipped.
+    """
+
+    def __init__(self):
+        self.terminal = None
+        self._last_msc = {}
+
+    def start(self) -> bool:
+        import MetaTrader5
+
+        self.terminal = MetaTrader5
+        if not self.terminal.initialize(path=config.MT5_PATH, login=config.MT5_LOGIN,
+                                        password=config.MT5_PASSWORD, server=config.MT5_SERVER):
+            logger.error(f"Price terminal initialization failed: {self.terminal.last_error()}")
+            return False
+        logger.info("Paper trading on live terminal prices.")
+        return True
+
+    def shutdown(self):
+        if self.terminal:
+            self.terminal.shutdown()
+
+    def symbol_info(self, symbol: str):
+        info = self.terminal.symbol_info(symbol) if self.terminal else None
+        if info and not info.visible:
+            self.terminal.symbol_select(symbol, True)
+        return info
+
+    def poll(self, symbols: Iterable[str]) -> Iterator[RawTick]:
+        if not self.terminal:
+            return
+        for symbol in symbols:
+            last_msc = self._last_msc.get(symbol)
+            if last_msc is None:
+                tick = self.terminal.symbol_info_tick(symbol)
+                if tick:
+                    self._last_msc[symbol] = tick.time_msc
+                    yield symbol, tick.time_msc, tick.bid, tick.ask
+                continue
+
+            since = datetime.fromtimestamp(last_msc / 1000.0, tz=timezone.utc)
+            ticks = self.terminal.copy_ticks_from(symbol, since, MAX_TICKS_PER_PULL, self.terminal.COPY_TICKS_INFO)
+            if ticks is None or not len(ticks):
+                continue
+            for time_msc, bid, ask in zip(ticks["time_msc"], ticks["bid"], ticks["ask"]):
+                if time_msc > last_msc:
+                    last_msc = int(time_msc)
+                    yield symbol, last_msc, float(bid), float(ask)
+            self._last_msc[symbol] = last_msc
+
+
+def create_feed(source: Optional[str] = None):
+    source = source or config.PAPER_PRICE_SOURCE
+    if source == "auto":
+        try:
+            import MetaTrader5  # noqa: F401
+            source = "terminal"
+        except ImportError:
+            source = "recorded"
+    if source == "terminal":
+        return TerminalTickFeed()
+    return RecordedTickFeed(config.PAPER_REPLAY_DIR, config.PAPER_REPLAY_DAY, config.PAPER_REPLAY_SPEED)
@@ -0,0 +1,138 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional, Tuple
+from app.log_setup import setup_logger
+from app.pipeline.protocol import LENGTH
+
+logger = setup_logger("IPCChannel")
+
+MAX_FRAME = 1 << 20
+MAX_BACKOFF_SECONDS = 5.0
+
+
+def parse_address(address: str) -> Tuple[str, object]:
+    """
+    "unix:///run/bot/exec.sock" -> ("unix", path), "tcp://127.0.0.1:8766" -> ("tcp", (host, port)).
+    Unix sockets are preferred where available; TCP on localhost works everywhere (MT5 needs Windows).
+    """
+    if address.startswith("unix://"):
+        return "unix", address[len("unix://"):]
+    if address.startswith("tcp://"):
+        host, port = address[len("tcp://"):].rsplit(":", 1)
+        return "tcp", (host, int(port))
+    raise ValueError(f"Unsupported IPC address: {address}")
+
+
+def offset_address(address: str, index: int) -> str:
+    """Distinct address per process from one setting: port + index, or path + ".index"."""
+    if not index:
+        return address
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return f"{address}.{index}"
+    return f"tcp://{target[0]}:{target[1] + index}"
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds the limit")
+    return await reader.readexactly(length)
+
+
+async def serve(address: str, handler: Callable[[bytes], Awaitable[None]]):
+    """
+    Accepts connections on `address` and awaits handler(frame) for every frame, in order.
+    """
+    async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                frame = await read_frame(reader)
+                try:
+                    await handler(frame)
+                except Exception as e:
+                    logger.error(f"Error handling frame: {e}")
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            logger.error(f"IPC connection error: {e}")
+        finally:
+            writer.close()
+
+    kind, target = parse_address(address)
+    if kind == "unix":
+        if os.path.exists(target):
+            os.unlink(target)  # stale socket from a previous run
+        server = await asyncio.start_unix_server(on_connection, path=target)
+    else:
+        server = await asyncio.start_server(on_connection, host=target[0], port=target[1])
+
+    logger.info(f"Listening on {address}")
+    async with server:
+        await server.serve_forever()
+
+
+class FrameSender:
+    """
+    Persistent, self-reconnecting connection to a stage. send() returns once the frame
+    has been written to the socket, post() right away; frames wait in the queue while
+    the peer restarts.
+    """
+
+    def __init__(self, address: str, max_queue: int = 10_000):
+        self.address = address
+        self.running = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def send(self, frame: bytes):
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((LENGTH.pack(len(frame)) + frame, done))
+        await done
+
+    def post(self, frame: bytes):
+        """Queues a frame without waiting for it to be written (dropped if the queue is full)."""
+        try:
+            self._queue.put_nowait((LENGTH.pack(len(frame)) + frame, asyncio.get_running_loop().create_future()))
+        except asyncio.QueueFull:
+            logger.warning(f"Queue to {self.address} is full, dropping a frame.")
+
+    async def _connect(self):
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            _, self._writer = await asyncio.open_unix_connection(path=target)
+        else:
+            _, self._writer = await asyncio.open_connection(host=target[0], port=target[1])
+        logger.info(f"Connected to {self.address}")
+
+    async def start_loop(self):
+        self.running = True
+        backoff = 0.1
+        pending = None
+
+        while self.running:
+            if self._writer is None:
+                try:
+                    await self._connect()
+                    backoff = 0.1
+                except OSError as e:
+                    logger.warning(f"Cannot reach {self.address} ({e}), retrying in {backoff:.1f}s")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                    continue
+
+            if pending is None:
+                pending = await self._queue.get()
+            data, done = pending
+            try:
+                self._writer.write(data)
+                await self._writer.drain()
+            except (ConnectionError, OSError) as e:
+                logger.warning(f"Lost connection to {self.address}: {e}")
+                self._writer.close()
+                self._writer = None
+                continue  # resend `pending` after reconnecting
+
+            if not done.done():
+                done.set_result(None)
+            pending = None
@@ -0,0 +1,134 @@
+"""
+Fixed binary schema for the frames exchanged between pipeline processes.
+
+Every frame is a little-endian header followed by a type-specific body:
+
+    header  version:u8 type:u8 chat_id:i64 message_id:i64 magic:i32 recv_ns:i64 sent_at:f64
+    RAW     text:utf-8 (rest of the frame)
+    ACK     (empty) execution has journaled chat_id/message_id
+    SIGNAL  parsed_ns:i64 symbol:16s action:u8 order_type:u8 flags:u8 sl:f64 value:f64
+            n_entry:u8 n_tp:u8 entry_range:f64[n_entry] tp_list:f64[n_tp]
+
+On the wire each frame is prefixed with its length (u32).
+"""
+import math
+import struct
+from typing import NamedTuple, Optional, Union
+from app.models.signal import TradeSignal
+
+VERSION = 1
+MSG_RAW = 1
+MSG_SIGNAL = 2
+MSG_ACK = 3
+
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<BBqqiqd")
+SIGNAL_BODY = struct.Struct("<q16sBBBddBB")
+
+ACTIONS = ("BUY", "SELL", "MODIFY")
+ORDER_TYPES = ("MARKET", "BUY_LIMIT", "SELL_LIMIT", "BUY_STOP", "SELL_STOP", "BREAK_EVEN", "MOVE_SL", "MOVE_TP")
+
+FLAG_SIGNAL = 1   # a signal was parsed (otherwise the message was not a signal)
+FLAG_SL = 2
+FLAG_VALUE = 4
+FLAG_ENTRY = 8    # entry_range is a list (otherwise None)
+FLAG_TP = 16      # tp_list is a list (otherwise None)
+
+
+class RawMessage(NamedTuple):
+    chat_id: int
+    message_id: Optional[int]
+    magic: int
+    recv_ns: int             # when the ingestion process received it (time.time_ns)
+    sent_at: Optional[float] # Telegram timestamp
+    text: str
+
+
+class ParsedMessage(NamedTuple):
+    chat_id: int
+    message_id: Optional[int]
+    magic: int
+    recv_ns: int
+    sent_at: Optional[float]
+    parsed_ns: int
+    signal: Optional[TradeSignal]
+
+
+class Ack(NamedTuple):
+    chat_id: int
+    message_id: int
+
+
+def _header(msg_type: int, msg) -> bytes:
+    return HEADER.pack(
+        VERSION, msg_type, msg.chat_id, -1 if msg.message_id is None else msg.message_id,
+        msg.magic, msg.recv_ns, math.nan if msg.sent_at is None else msg.sent_at
+    )
+
+
+def encode_raw(msg: RawMessage) -> bytes:
+    return _header(MSG_RAW, msg) + msg.text.encode("utf-8")
+
+
+def encode_ack(chat_id: int, message_id: int) -> bytes:
+    return HEADER.pack(VERSION, MSG_ACK, chat_id, message_id, 0, 0, math.nan)
+
+
+def encode_parsed(msg: ParsedMessage) -> bytes:
+    signal = msg.signal
+    if signal is None:
+        body = SIGNAL_BODY.pack(msg.parsed_ns, b"", 0, 0, 0, 0.0, 0.0, 0, 0)
+        return _header(MSG_SIGNAL, msg) + body
+
+    symbol = signal.symbol.encode("ascii")
+    if len(symbol) > 16:
+        raise ValueError(f"Symbol too long for the wire format: {signal.symbol}")
+
+    entries = signal.entry_range or []
+    tps = signal.tp_list or []
+    flags = FLAG_SIGNAL
+    flags |= FLAG_SL if signal.sl is not None else 0
+    flags |= FLAG_VALUE if signal.value is not None else 0
+    flags |= FLAG_ENTRY if signal.entry_range is not None else 0
+    flags |= FLAG_TP if signal.tp_list is not None else 0
+
+    body = SIGNAL_BODY.pack(
+        msg.parsed_ns, symbol, ACTIONS.index(signal.action), ORDER_TYPES.index(signal.order_type), flags,
+        signal.sl or 0.0, signal.value or 0.0, len(entries), len(tps)
+    )
+    prices = struct.pack(f"<{len(entries) + len(tps)}d", *entries, *tps)
+    return _header(MSG_SIGNAL, msg) + body + prices
+
+
+def decode(frame: bytes) -> Union[RawMessage, ParsedMessage, Ack]:
+    version, msg_type, chat_id, message_id, magic, recv_ns, sent_at = HEADER.unpack_from(frame)
+    if version != VERSION:
+        raise ValueError(f"Unsupported frame version {version}")
+
+    message_id = None if message_id < 0 else message_id
+    sent_at = None if math.isnan(sent_at) else sent_at
+    offset = HEADER.size
+
+    if msg_type == MSG_RAW:
+        return RawMessage(chat_id, message_id, magic, recv_ns, sent_at, frame[offset:].decode("utf-8"))
+
+    if msg_type == MSG_ACK:
+        return Ack(chat_id, message_id)
+
+    if msg_type != MSG_SIGNAL:
+        raise ValueError(f"Unknown frame type {msg_type}")
+
+    parsed_ns, symbol, action, order_type, flags, sl, value, n_entry, n_tp = SIGNAL_BODY.unpack_from(frame, offset)
+    signal = None
+    if flags & FLAG_SIGNAL:
+        prices = struct.unpack_from(f"<{n_entry + n_tp}d", frame, offset + SIGNAL_BODY.size)
+        signal = TradeSignal(
+            symbol=symbol.rstrip(b"\0").decode("ascii"),
+            action=ACTIONS[action],
+            order_type=ORDER_TYPES[order_type],
+            entry_range=list(prices[:n_entry]) if flags & FLAG_ENTRY else None,
+            sl=sl if flags & FLAG_SL else None,
+            tp_list=list(prices[n_entry:]) if flags & FLAG_TP else None,
+            value=value if flags & FLAG_VALUE else None,
+        )
+    return ParsedMessage(chat_id, message_id, magic, recv_ns, sent_at, parsed_ns, signal)
@@ -0,0 +1,163 @@
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+from app.config import config
+from app.log_setup import setup_logger
+from app.models.signal import TradeSignal
+from app.pipeline.channel import offset_address
+from app.services.exposure_svc import ExposureLedger
+from app.services.journal_svc import SignalJournal
+from app.services.mt5_api import mt5
+from app.services.mt5_svc import MT5Service
+from app.services.recorder_svc import MarketRecorder
+from app.services.trade_executor import TradeExecutor
+from app.workers.monitor import MonitorWorker
+from app.workers.pending_orders import PendingOrderManager
+from app.workers.tick_recorder import TickRecorderWorker
+from app.workers.loop_watchdog import LoopWatchdog
+from app.workers.trailing import TrailingWorker
+
+logger = setup_logger("Runtime")
+
+# Simple Keyword Filter
+FULL_KEYWORDS = [
+    "BUY", "SELL", "LIMIT", "STOP", "TP", "SL", "XAU", "GOLD",
+    "ENTRY", "EXECUTE", "CLOSE", "MODIFY", "UPDATE", "MOVE", "BE", "OPEN", "RISK",
+    "TAKE PROFIT", "STOP LOSS", "PENDING", "INSTANT", "PIP", "PIPS", "POINT", "POINTS",
+    "EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "US30", "DOW", "NAS100", "NASDAQ",
+    "BTC", "ETH", "OIL", "CRUDE"
+]
+
+
+def looks_like_signal(text: str) -> bool:
+    """Only send to AI if at least 2 keywords are present."""
+    text_upper = text.upper()
+    return sum(1 for word in FULL_KEYWORDS if word in text_upper) >= 2
+
+
+def is_stale(sent_at: Optional[float]) -> bool:
+    return bool(sent_at) and time.time() - sent_at > config.SIGNAL_MAX_AGE_SECONDS
+
+
+class LatencyTracker:
+    """
+    Rolling end-to-end latency (message received -> orders sent), logged every few samples
+    so single- and multi-process deployments can be compared from the logs.
+    """
+
+    def __init__(self, label: str, report_every: int = 20, window: int = 1000):
+        self.label = label
+        self.report_every = report_every
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def observe(self, start_ns: int, end_ns: Optional[int] = None) -> float:
+        ms = ((end_ns or time.time_ns()) - start_ns) / 1e6
+        self.samples.append(ms)
+        self.count += 1
+        if self.count % self.report_every == 0:
+            self.report()
+        return ms
+
+    def report(self):
+        if not self.samples:
+            return
+        ordered = sorted(self.samples)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        logger.info(
+            f"E2E latency [{self.label}] n={len(ordered)} p50={p50:.1f}ms p95={p95:.1f}ms max={ordered[-1]:.1f}ms"
+        )
+
+
+def watchdog_tasks(name: str, index: int = 0) -> list:
+    """
+    Loop watchdog + profiler endpoint for this process. `index` offsets the endpoint
+    address so every stage of a multi-process deployment gets its own.
+    """
+    if not config.LOOP_WATCHDOG_ENABLED:
+        return []
+    address = offset_address(config.PROFILER_ADDRESS, index) if config.PROFILER_ADDRESS else ""
+    return [LoopWatchdog(name, address).start_loop()]
+
+
+async def replay_journal(journal: SignalJournal, handle: Callable[[dict, Optional[TradeSignal]], Awaitable[None]]):
+    """
+    Feeds messages that were interrupted by a crash / restart back through `handle`
+    (message record, parsed signal or None if it was never parsed), oldest first.
+    """
+    for entry in journal.unfinished():
+        message = entry["message"]
+        if entry["parsed"] and entry["signal"] is None:
+            # Parsed as "not a signal" before the crash: nothing to do
+            journal.finish(message["chat_id"], message["message_id"])
+            continue
+        logger.info(f"Replaying journaled message {message['message_id']} from chat {message['chat_id']}")
+        await handle(message, TradeSignal(**entry["signal"]) if entry["signal"] else None)
+
+
+class ExecutionStack:
+    """
+    The MT5 connection and everything that trades or monitors on it. Exactly one per
+    deployment: in the main process (single mode) or in the execution process.
+    """
+
+    def __init__(self, journal: SignalJournal):
+        self.journal = journal
+        self.mt5 = MT5Service()
+        self.ledger = None
+        self.order_manager = None
+        self.recorder = None
+        self.executor = None
+        self.monitor = None
+
+    def start(self) -> bool:
+        # Connect to MT5 immediately
+        if not self.mt5.connect():
+            logger.critical("Failed to connect to MT5.")
+            return False
+
+        # Find out which legs of interrupted signals already reached the broker
+        self.journal.reconcile(self.mt5)
+
+        self.ledger = ExposureLedger(self.mt5)
+        self.ledger.bootstrap()
+
+        self.order_manager = PendingOrderManager(self.mt5, ledger=self.ledger)
+        self.order_manager.bootstrap()
+
+        self.recorder = MarketRecorder(config.RECORDER_DIR) if config.RECORDER_ENABLED else None
+
+        self.executor = TradeExecutor(
+            self.mt5, order_manager=self.order_manager, journal=self.journal,
+            recorder=self.recorder, ledger=self.ledger
+        )
+        self.monitor = MonitorWorker(self.executor)
+        return True
+
+    def tasks(self) -> list:
+        tasks = [
+            self.monitor.start_loop(),
+            self.order_manager.start_loop(),
+            self.journal.start_loop()
+        ]
+        # Replayed paper prices are not market data: never write them back into a recording
+        if self.recorder and not getattr(mt5, "replaying", False):
+            tasks.append(TickRecorderWorker(self.mt5, self.recorder).start_loop())
+        if config.TRAILING_ENABLED:
+            tasks.append(TrailingWorker(self.mt5, ledger=self.ledger).start_loop())
+        return tasks
+
+    def record(self, kind: int, **fields):
+        if not self.recorder:
+            return
+        try:
+            self.recorder.record_event(kind, **fields)
+        except Exception as e:
+            logger.error(f"Recorder error: {e}")
+
+    def close(self):
+        self.journal.close()
+        if self.recorder:
+            self.recorder.close()
+        self.mt5.shutdown()
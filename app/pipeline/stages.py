@@ -0,0 +1,279 @@
+"""
+Entry points of the three processes used when PIPELINE_MODE=multi:
+
+    ingestion  Telegram -> keyword filter -> RAW frame            (owns the message journal)
+    parser     RAW frame -> AIService -> SIGNAL frame             (stateless)
+    execution  SIGNAL frame -> TradeExecutor + all MT5 workers    (owns MT5 and the leg journal)
+               -> ACK frame back to ingestion once journaled
+"""
+import asyncio
+import struct
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+from app.config import config
+from app.log_setup import setup_logger
+from app.models.signal import TradeSignal
+from app.pipeline.channel import FrameSender, serve
+from app.pipeline.protocol import Ack, ParsedMessage, RawMessage, decode, encode_ack, encode_parsed, encode_raw
+from app.pipeline.runtime import ExecutionStack, LatencyTracker, is_stale, looks_like_signal, replay_journal, watchdog_tasks
+from app.services.journal_svc import SignalJournal
+from app.services.recorder_svc import (
+    EVENT_SIGNAL_PARSED, EVENT_SIGNAL_RECEIVED, EVENT_SIGNAL_SKIPPED, SKIP_NOT_A_SIGNAL
+)
+
+logger = setup_logger("PipelineStage")
+
+EXECUTION_JOURNAL_SUFFIX = ".exec"
+ACK_CHECK_SECONDS = 5.0
+
+
+# =====================================================================================
+# 📥 INGESTION
+# =====================================================================================
+class AckedForwarder:
+    """
+    Sends journaled messages to the parser and finishes them in the ingestion journal only
+    once execution acknowledges them (i.e. has journaled them itself). Unacknowledged
+    messages are resent after PIPELINE_ACK_TIMEOUT_SECONDS, so a parser crash or a frame
+    lost in a restart never drops a signal. One message per chat is in flight at a time:
+    execution then sees every chat's messages in order, which its journal's dedupe relies on.
+    """
+
+    def __init__(self, journal: SignalJournal, sender: FrameSender):
+        self.journal = journal
+        self.sender = sender
+        self.running = False
+        self._queues: Dict[int, Deque[RawMessage]] = {}
+        self._in_flight: Dict[int, Tuple[RawMessage, float]] = {}  # chat_id -> (message, sent at, monotonic)
+
+    def submit(self, message: RawMessage):
+        if message.message_id is None:
+            # Not journaled: nothing to acknowledge
+            self.sender.post(encode_raw(message))
+            return
+        self._queues.setdefault(message.chat_id, deque()).append(message)
+        self._pump(message.chat_id)
+
+    def _pump(self, chat_id: int):
+        queue = self._queues.get(chat_id)
+        while chat_id not in self._in_flight and queue:
+            message = queue.popleft()
+            if is_stale(message.sent_at):
+                logger.warning(f"SKIPPED: Message {message.message_id} went stale before execution took it.")
+                self.journal.finish(chat_id, message.message_id, "stale")
+                continue
+            self._send(message)
+
+    def _send(self, message: RawMessage):
+        self.sender.post(encode_raw(message))
+        self._in_flight[message.chat_id] = (message, time.monotonic())
+
+    def on_ack(self, chat_id: int, message_id: int):
+        in_flight = self._in_flight.get(chat_id)
+        if in_flight is None or in_flight[0].message_id != message_id:
+            return  # duplicate acknowledgement
+        del self._in_flight[chat_id]
+        # From here the execution journal takes over
+        self.journal.finish(chat_id, message_id, "forwarded")
+        self._pump(chat_id)
+
+    async def start_loop(self):
+        self.running = True
+        while self.running:
+            await asyncio.sleep(ACK_CHECK_SECONDS)
+            now = time.monotonic()
+            for chat_id, (message, sent_at) in list(self._in_flight.items()):
+                if now - sent_at < config.PIPELINE_ACK_TIMEOUT_SECONDS:
+                    continue
+                if is_stale(message.sent_at):
+                    logger.warning(f"SKIPPED: Message {message.message_id} was never acknowledged and is stale.")
+                    del self._in_flight[chat_id]
+                    self.journal.finish(chat_id, message.message_id, "stale")
+                    self._pump(chat_id)
+                else:
+                    logger.warning(f"Message {message.message_id} not acknowledged by execution, resending.")
+                    self._send(message)
+
+
+async def ingestion_main():
+    from app.services.telegram_svc import TelegramBot
+
+    journal = SignalJournal()
+    journal.load()
+    sender = FrameSender(config.PIPELINE_PARSER_ADDRESS)
+    forwarder = AckedForwarder(journal, sender)
+
+    async def forward(text: str, magic_number: int, chat_id: int = None, message_id: int = None,
+                      sent_at: float = None, replay: bool = False):
+        received_ns = time.time_ns()
+        journaled = message_id is not None
+
+        if journaled and not replay:
+            if journal.is_seen(chat_id, message_id):
+                logger.info(f"Ignored message {message_id}: already handled.")
+                return
+            journal.record_message(chat_id, message_id, magic_number, text, sent_at)
+
+        if journaled and is_stale(sent_at):
+            logger.warning(f"SKIPPED: Message {message_id} is {int(time.time() - sent_at)}s old.")
+            journal.finish(chat_id, message_id, "stale")
+            return
+
+        if not looks_like_signal(text):
+            logger.info("Ignored message (No trading keywords found).")
+            if journaled:
+                journal.finish(chat_id, message_id, "ignored")
+            return
+
+        forwarder.submit(RawMessage(chat_id, message_id, magic_number, received_ns, sent_at, text))
+
+    async def on_frame(frame: bytes):
+        message = decode(frame)
+        if isinstance(message, Ack):
+            forwarder.on_ack(message.chat_id, message.message_id)
+
+    async def replay(message: dict, signal: TradeSignal):
+        # Everything execution had not acknowledged before the restart is sent again
+        await forward(
+            message["text"], message["magic"], message["chat_id"], message["message_id"],
+            message.get("sent_at") or message["t"], replay=True
+        )
+
+    await replay_journal(journal, replay)
+
+    bot = TelegramBot(callback=forward, journal=journal)
+    try:
+        await asyncio.gather(
+            bot.start(), journal.start_loop(), sender.start_loop(), forwarder.start_loop(),
+            serve(config.PIPELINE_INGESTION_ADDRESS, on_frame), *watchdog_tasks("ingestion", 2)
+        )
+    finally:
+        journal.close()
+
+
+# =====================================================================================
+# 🧠 PARSER
+# =====================================================================================
+async def parser_main():
+    from app.services.ai_parser_svc import AIService
+
+    ai_service = AIService()
+    sender = FrameSender(config.PIPELINE_EXECUTOR_ADDRESS)
+    slots = asyncio.Semaphore(config.PIPELINE_PARSER_CONCURRENCY)
+    chat_locks: Dict[int, asyncio.Lock] = {}
+
+    async def parse(message: RawMessage):
+        # Parallel across chats, in order within a chat (an update must follow its signal)
+        async with chat_locks.setdefault(message.chat_id, asyncio.Lock()), slots:
+            signal = await ai_service.parse_signal(message.text)
+            parsed = ParsedMessage(
+                message.chat_id, message.message_id, message.magic, message.recv_ns,
+                message.sent_at, time.time_ns(), signal
+            )
+            try:
+                frame = encode_parsed(parsed)
+            except (ValueError, struct.error) as e:
+                # Still send a frame: execution must ack the message or its chat stays blocked
+                logger.error(f"Signal of message {message.message_id} does not fit the wire format: {e}")
+                frame = encode_parsed(parsed._replace(signal=None))
+            await sender.send(frame)
+
+    async def on_frame(frame: bytes):
+        message = decode(frame)
+        if isinstance(message, RawMessage):
+            task = asyncio.create_task(parse(message))
+            task.add_done_callback(_log_task_error)
+
+    await asyncio.gather(
+        serve(config.PIPELINE_PARSER_ADDRESS, on_frame), sender.start_loop(), *watchdog_tasks("parser", 1)
+    )
+
+
+def _log_task_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error(f"Parse task failed: {task.exception()}")
+
+
+# =====================================================================================
+# ⚙️ EXECUTION
+# =====================================================================================
+async def execution_main():
+    journal = SignalJournal(config.JOURNAL_PATH + EXECUTION_JOURNAL_SUFFIX)
+    journal.load()
+
+    stack = ExecutionStack(journal)
+    if not stack.start():
+        # Exit so the supervisor restarts us with backoff
+        raise SystemExit(1)
+
+    latency = LatencyTracker("multi-process")
+    acks = FrameSender(config.PIPELINE_INGESTION_ADDRESS)
+
+    def execute(signal: TradeSignal, magic_number: int, chat_id: int, message_id: int):
+        journaled = message_id is not None
+        family_id = journal.family_id_for(magic_number, message_id) if journaled else None
+        stack.executor.execute_signal(signal, magic_number, family_id, message_id)
+        if journaled:
+            journal.finish(chat_id, message_id)
+
+    async def on_frame(frame: bytes):
+        message = decode(frame)
+        if not isinstance(message, ParsedMessage):
+            return
+
+        journaled = message.message_id is not None
+        if journaled and journal.is_seen(message.chat_id, message.message_id):
+            # A resend whose acknowledgement was lost
+            logger.info(f"Ignored message {message.message_id}: already handled.")
+            acks.post(encode_ack(message.chat_id, message.message_id))
+            return
+
+        event = dict(magic=message.magic, ref_id=message.message_id)
+        stack.record(EVENT_SIGNAL_RECEIVED, time_ns=message.recv_ns, **event)
+        if message.signal is None:
+            stack.record(EVENT_SIGNAL_SKIPPED, code=SKIP_NOT_A_SIGNAL, time_ns=message.parsed_ns, **event)
+            if journaled:
+                acks.post(encode_ack(message.chat_id, message.message_id))
+            return
+        stack.record(EVENT_SIGNAL_PARSED, symbol=message.signal.symbol, time_ns=message.parsed_ns, **event)
+
+        if journaled:
+            journal.record_message(message.chat_id, message.message_id, message.magic, "", message.sent_at)
+            journal.record_signal(message.chat_id, message.message_id, message.signal)
+            # Journaled here: from now on a crash is recovered by this process's replay
+            acks.post(encode_ack(message.chat_id, message.message_id))
+
+        execute(message.signal, message.magic, message.chat_id, message.message_id)
+        latency.observe(message.recv_ns)
+
+    async def replay(message: dict, signal: TradeSignal):
+        if is_stale(message.get("sent_at") or message["t"]):
+            journal.finish(message["chat_id"], message["message_id"], "stale")
+        elif signal:
+            execute(signal, message["magic"], message["chat_id"], message["message_id"])
+        else:
+            journal.finish(message["chat_id"], message["message_id"])
+
+    await replay_journal(journal, replay)
+
+    try:
+        await asyncio.gather(
+            serve(config.PIPELINE_EXECUTOR_ADDRESS, on_frame), acks.start_loop(), *stack.tasks(),
+            *watchdog_tasks("execution", 0)
+        )
+    finally:
+        stack.close()
+
+
+# Picklable process targets for the supervisor
+def run_ingestion():
+    asyncio.run(ingestion_main())
+
+
+def run_parser():
+    asyncio.run(parser_main())
+
+
+def run_execution():
+    asyncio.run(execution_main())
@@ -0,0 +1,69 @@
+import multiprocessing
+import time
+from app.log_setup import setup_logger
+from app.pipeline.stages import run_execution, run_ingestion, run_parser
+
+logger = setup_logger("Supervisor")
+
+# Started in this order so each stage finds its downstream peer listening
+STAGES = {
+    "execution": run_execution,
+    "parser": run_parser,
+    "ingestion": run_ingestion,
+}
+
+MAX_BACKOFF_SECONDS = 60.0
+HEALTHY_AFTER_SECONDS = 60.0
+POLL_SECONDS = 0.5
+
+
+def run_supervisor():
+    """
+    Runs every stage in its own process and restarts any that exits, with exponential
+    backoff for stages that keep crashing. Ctrl+C stops all of them.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    processes = {}
+    started_at = {}
+    failures = {name: 0 for name in STAGES}
+    restart_at = {name: 0.0 for name in STAGES}
+
+    logger.info("Starting multi-process pipeline: " + ", ".join(STAGES))
+    try:
+        while True:
+            now = time.time()
+            for name, target in STAGES.items():
+                process = processes.get(name)
+                if process is not None and process.is_alive():
+                    continue
+
+                if process is not None:
+                    # It died: schedule a restart
+                    uptime = now - started_at[name]
+                    failures[name] = 0 if uptime >= HEALTHY_AFTER_SECONDS else failures[name] + 1
+                    backoff = min(2 ** failures[name] - 1, MAX_BACKOFF_SECONDS)
+                    logger.error(
+                        f"Stage '{name}' exited with code {process.exitcode} after {uptime:.0f}s, "
+                        f"restarting in {backoff:.0f}s"
+                    )
+                    restart_at[name] = now + backoff
+                    processes[name] = None
+                    continue
+
+                if now >= restart_at[name]:
+                    process = ctx.Process(target=target, name=f"bot-{name}", daemon=False)
+                    process.start()
+                    processes[name] = process
+                    started_at[name] = now
+                    logger.info(f"Stage '{name}' started (pid {process.pid})")
+
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        logger.info("Stopping pipeline...")
+    finally:
+        for process in processes.values():
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            if process is not None:
+                process.join(timeout=10)
@@ -1,15 +1,21 @@
-import json
+import time
 from typing import Optional
 # import google.generativeai as genai # REMOVE THIS LINE
 import openai # ADD THIS LINE
 from app.config import config
 from app.log_setup import setup_logger
 from app.models.signal import TradeSignal
+from app.services.signal_decoder import decode_signal_response
 
 logger = setup_logger("AIService")
 
 class AIService:
-    def __init__(self):
+    def __init__(self, model_name: Optional[str] = None, recorder=None):
+        """
+        model_name overrides OPENROUTER_MODEL (used by the parser benchmark).
+        recorder, if given, gets every raw model response (see app.benchmarks.recorder).
+        """
+        self.recorder = recorder
         try:
             # Configure the OpenAI client to use the OpenRouter API endpoint
             self.client = openai.AsyncClient(
@@ -17,7 +23,7 @@ class AIService:
                 api_key=config.OPENROUTER_API_KEY
             )
             # The model name is now retrieved from config
-            self.model_name = config.OPENROUTER_MODEL
+            self.model_name = model_name or config.OPENROUTER_MODEL
             
             logger.info(f"AI Service initialized. Using model: {self.model_name} via OpenRouter.")
         except Exception as e:
@@ -77,61 +83,24 @@ Rules:
             ]
 
             # Use the chat completions endpoint, requesting JSON output
+            started = time.perf_counter()
             response = await self.client.chat.completions.create(
                 model=self.model_name,
                 messages=messages,
                 response_format={"type": "json_object"}
             )
+            latency_ms = (time.perf_counter() - started) * 1000
 
             if not response.choices:
                 logger.error("Empty response from OpenRouter.")
                 return None
 
             result_json = response.choices[0].message.content
-            
-            # Clean markdown if included (models sometimes ignore the JSON format request)
-            if result_json.startswith("```"):
-                result_json = (
-                    result_json.replace("```json", "")
-                    .replace("```", "")
-                    .strip()
-                )
+            if self.recorder:
+                self.recorder.record(raw_text, self.model_name, self.system_prompt, result_json, latency_ms)
 
-            # Check for null signal responses
-            if result_json.lower() == "null" or not result_json:
-                logger.info("Not a valid trading signal.")
-                return None
-
-            # Convert to Python dict
-            signal_data = json.loads(result_json)
-            
-            # Unwrap if the model wraps the JSON in a top-level key (e.g., {"signal": {...}})
-            if isinstance(signal_data, dict) and 'signal' in signal_data and signal_data.keys() == {'signal'}:
-                signal_data = signal_data['signal']
-# ... inside parse_signal method ...
-
-            # Validate with Pydantic
-            try:
-                signal = TradeSignal(**signal_data)
-                logger.info(f"Parsed: {signal}")
-                return signal
-            except Exception:
-                # CHANGED: Don't print huge errors for chatter. Just log a simple warning.
-                logger.warning(f"Ignored message: AI parsed data but it was incomplete (likely not a signal).")
-                return None
+            return decode_signal_response(result_json)
 
         except Exception as e:
             logger.error(f"Parsing Error: {e}")
             return None
-        #     # Validate with Pydantic
-        #     try:
-        #         signal = TradeSignal(**signal_data)
-        #         logger.info(f"Parsed: {signal}")
-        #         return signal
-        #     except Exception as validation_error:
-        #         logger.error(f"Validation Error: {validation_error} | Data: {signal_data}")
-        #         return None
-
-        # except Exception as e:
-        #     logger.error(f"Parsing Error: {e}")
-        #     return None
\ No newline at end of file
@@ -0,0 +1,289 @@
+import time
+from app.services.mt5_api import mt5
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from app.config import config
+from app.log_setup import setup_logger
+
+logger = setup_logger("ExposureLedger")
+
+EPSILON = 1e-9
+ACCOUNT = ("account", None)
+PENDING_TYPES = {mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_SELL_LIMIT, mt5.ORDER_TYPE_BUY_STOP, mt5.ORDER_TYPE_SELL_STOP}
+BUY_PENDING_TYPES = {mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP}
+# Final states of an order that never became a position (fills are released by their IN deal)
+RELEASED_STATES = {mt5.ORDER_STATE_CANCELED, mt5.ORDER_STATE_REJECTED, mt5.ORDER_STATE_EXPIRED}
+HISTORY_PADDING_SECONDS = 86400  # history is in server time
+
+
+@dataclass
+class Exposure:
+    symbol: str
+    magic: int
+    family_id: Optional[str]
+    direction: int          # +1 buy, -1 sell
+    volume: float
+    price: float
+    sl: float
+    value_per_price: float  # account currency per 1.0 price move per lot
+    placed_at: float = 0.0  # pending orders only
+
+    @property
+    def risk(self) -> float:
+        """Money lost if the SL is hit. 0 once the SL is at/over entry, unknown (0) without SL."""
+        if not self.sl:
+            return 0.0
+        distance = (self.price - self.sl) * self.direction
+        return max(distance, 0.0) * self.volume * self.value_per_price
+
+
+class Totals:
+    __slots__ = ("net", "gross", "risk")
+
+    def __init__(self):
+        self.net = 0.0
+        self.gross = 0.0
+        self.risk = 0.0
+
+
+class ExposureLedger:
+    """
+    Net/gross lots and risk-to-SL per symbol, per group (magic) and for the whole account,
+    kept up to date incrementally from order results and the deal stream. Pending orders
+    count as exposure from the moment they are placed. Pre-trade checks are dict lookups.
+    """
+
+    def __init__(self, mt5_service):
+        self.mt5 = mt5_service
+        self._positions: Dict[int, Exposure] = {}   # position ticket -> exposure
+        self._pending: Dict[int, Exposure] = {}     # pending order ticket -> reserved exposure
+        self._totals: Dict[Tuple[str, object], Totals] = {}
+        self._family_legs: Dict[str, int] = {}      # family_id -> open positions + pending orders
+        self._value_per_price: Dict[str, float] = {}
+
+    # =====================================================================================
+    # 🧮 AGGREGATES
+    # =====================================================================================
+    def totals(self, scope: str, key=None) -> Totals:
+        """scope is "symbol", "magic" or "account"."""
+        return self._totals.get((scope, key)) or Totals()
+
+    @property
+    def open_families(self) -> int:
+        return len(self._family_legs)
+
+    def _apply(self, exposure: Exposure, sign: int):
+        lots = exposure.volume * sign
+        risk = exposure.risk * sign
+        for key in (("symbol", exposure.symbol), ("magic", exposure.magic), ACCOUNT):
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = Totals()
+            totals.net += lots * exposure.direction
+            totals.gross += lots
+            totals.risk += risk
+
+        if exposure.family_id:
+            legs = self._family_legs.get(exposure.family_id, 0) + sign
+            if legs > 0:
+                self._family_legs[exposure.family_id] = legs
+            else:
+                self._family_legs.pop(exposure.family_id, None)
+
+    def value_per_price(self, symbol: str, symbol_info=None) -> float:
+        value = self._value_per_price.get(symbol)
+        if value is None:
+            info = symbol_info or self.mt5.get_symbol_info(symbol)
+            value = 0.0
+            if info and info.trade_tick_size:
+                value = info.trade_tick_value / info.trade_tick_size
+            self._value_per_price[symbol] = value
+        return value
+
+    # =====================================================================================
+    # 🚦 PRE-TRADE LIMITS
+    # =====================================================================================
+    def check(self, symbol: str, magic_number: int, direction: int, lots: float, risk: float,
+              family_id: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the reason the trade would breach a limit, or None if it may go ahead.
+        A limit of 0 is disabled.
+        """
+        by_symbol = self.totals("symbol", symbol)
+        by_group = self.totals("magic", magic_number)
+        account = self.totals("account")
+
+        if config.MAX_LOTS_PER_SYMBOL and by_symbol.gross + lots > config.MAX_LOTS_PER_SYMBOL + EPSILON:
+            return f"{symbol} gross lots {by_symbol.gross:.2f} + {lots:.2f} > {config.MAX_LOTS_PER_SYMBOL}"
+
+        net_after = by_symbol.net + direction * lots
+        if (config.MAX_NET_LOTS_PER_SYMBOL and abs(net_after) > config.MAX_NET_LOTS_PER_SYMBOL + EPSILON
+                and abs(net_after) > abs(by_symbol.net)):
+            return f"{symbol} net lots {by_symbol.net:+.2f} -> {net_after:+.2f} > {config.MAX_NET_LOTS_PER_SYMBOL}"
+
+        if config.MAX_LOTS_PER_GROUP and by_group.gross + lots > config.MAX_LOTS_PER_GROUP + EPSILON:
+            return f"group {magic_number} gross lots {by_group.gross:.2f} + {lots:.2f} > {config.MAX_LOTS_PER_GROUP}"
+
+        if (config.MAX_OPEN_FAMILIES and family_id not in self._family_legs
+                and self.open_families + 1 > config.MAX_OPEN_FAMILIES):
+            return f"{self.open_families} open signal families >= {config.MAX_OPEN_FAMILIES}"
+
+        if config.MAX_RISK_AMOUNT and account.risk + risk > config.MAX_RISK_AMOUNT + EPSILON:
+            return f"account risk {account.risk:.2f} + {risk:.2f} > {config.MAX_RISK_AMOUNT}"
+
+        return None
+
+    # =====================================================================================
+    # 📥 UPDATES
+    # =====================================================================================
+    def _exposure(self, symbol, magic_number, family_id, is_buy, volume, price, sl, symbol_info=None) -> Exposure:
+        return Exposure(
+            symbol=symbol,
+            magic=magic_number,
+            family_id=family_id if family_id and family_id.startswith("signal_") else None,
+            direction=1 if is_buy else -1,
+            volume=float(volume),
+            price=float(price),
+            sl=float(sl or 0.0),
+            value_per_price=self.value_per_price(symbol, symbol_info),
+        )
+
+    def on_open(self, ticket: int, symbol: str, magic_number: int, family_id: Optional[str], is_buy: bool,
+                volume: float, price: float, sl: float, symbol_info=None):
+        if ticket in self._positions:
+            return
+        exposure = self._exposure(symbol, magic_number, family_id, is_buy, volume, price, sl, symbol_info)
+        self._positions[ticket] = exposure
+        self._apply(exposure, +1)
+
+    def on_pending(self, ticket: int, symbol: str, magic_number: int, family_id: Optional[str], is_buy: bool,
+                   volume: float, price: float, sl: float, symbol_info=None):
+        if ticket in self._pending:
+            return
+        exposure = self._exposure(symbol, magic_number, family_id, is_buy, volume, price, sl, symbol_info)
+        exposure.placed_at = time.time()
+        self._pending[ticket] = exposure
+        self._apply(exposure, +1)
+
+    def on_order_removed(self, ticket: int):
+        exposure = self._pending.pop(ticket, None)
+        if exposure:
+            self._apply(exposure, -1)
+
+    def on_sl_change(self, ticket: int, sl: float):
+        exposure = self._positions.get(ticket)
+        if exposure:
+            self._apply(exposure, -1)
+            exposure.sl = float(sl or 0.0)
+            self._apply(exposure, +1)
+
+    def on_deals(self, deals: Optional[Iterable]):
+        if not deals:
+            return
+
+        for deal in deals:
+            if deal.entry == mt5.DEAL_ENTRY_IN:
+                # Release the reservation first: a resync may already have added the position
+                reserved = self._pending.pop(deal.order, None)
+                if reserved:
+                    self._apply(reserved, -1)
+                if deal.position_id in self._positions:
+                    continue
+                if reserved:
+                    # Pending order triggered: the reservation becomes a position at the fill price
+                    reserved.price = deal.price
+                    reserved.volume = deal.volume
+                    self._positions[deal.position_id] = reserved
+                    self._apply(reserved, +1)
+                else:
+                    self.on_open(
+                        deal.position_id, deal.symbol, deal.magic, deal.comment,
+                        deal.type == mt5.DEAL_TYPE_BUY, deal.volume, deal.price, 0.0
+                    )
+
+            elif deal.entry == mt5.DEAL_ENTRY_OUT:
+                exposure = self._positions.get(deal.position_id)
+                if not exposure:
+                    continue
+                self._apply(exposure, -1)
+                exposure.volume -= deal.volume
+                if exposure.volume > EPSILON:
+                    self._apply(exposure, +1)
+                else:
+                    del self._positions[deal.position_id]
+
+    def resync_positions(self, positions: Iterable):
+        """
+        Re-bases the position side of the ledger on a positions list that was fetched
+        anyway (monitor loop), correcting any drift. Pending reservations are kept.
+        """
+        current = {}
+        for p in positions:
+            current[p.ticket] = self._exposure(
+                p.symbol, p.magic, p.comment, p.type == mt5.POSITION_TYPE_BUY, p.volume, p.price_open, p.sl
+            )
+
+        for exposure in self._positions.values():
+            self._apply(exposure, -1)
+        self._positions = current
+        for exposure in self._positions.values():
+            self._apply(exposure, +1)
+
+    def on_history_orders(self, orders: Optional[Iterable]):
+        """
+        Releases the reservations of orders cancelled by hand, expired or rejected on the
+        broker side, as found in the order history.
+        """
+        if not orders:
+            return
+
+        for order in orders:
+            if order.ticket in self._pending and order.state in RELEASED_STATES:
+                logger.info(f"Pending order {order.ticket} removed on the broker side, releasing its exposure.")
+                self.on_order_removed(order.ticket)
+
+    def history_window(self, to_time: float) -> Optional[Tuple[float, float]]:
+        """
+        history_orders_get() range covering every reserved order. MT5 selects history orders
+        by setup time, so it starts at the oldest reservation. None when nothing is reserved.
+        """
+        if not self._pending:
+            return None
+        oldest = min(exposure.placed_at for exposure in self._pending.values())
+        return oldest - HISTORY_PADDING_SECONDS, to_time + HISTORY_PADDING_SECONDS
+
+    def resync_orders(self, orders: Iterable):
+        """
+        Re-bases the pending reservations on an orders list (startup), dropping orders
+        that are no longer on the terminal.
+        """
+        current = {}
+        for o in orders:
+            if o.type in PENDING_TYPES:
+                exposure = self._pending.get(o.ticket)
+                if exposure is None:
+                    exposure = self._exposure(
+                        o.symbol, o.magic, o.comment, o.type in BUY_PENDING_TYPES, o.volume_current, o.price_open, o.sl
+                    )
+                    exposure.placed_at = float(o.time_setup)
+                current[o.ticket] = exposure
+
+        for exposure in self._pending.values():
+            self._apply(exposure, -1)
+        self._pending = current
+        for exposure in self._pending.values():
+            self._apply(exposure, +1)
+
+    def bootstrap(self):
+        """One-off load of open positions and pending orders at startup."""
+        if not self.mt5.connected:
+            return
+
+        self.resync_positions(self.mt5.get_positions())
+        self.resync_orders(self.mt5.get_orders())
+
+        account = self.totals("account")
+        logger.info(
+            f"Exposure loaded: {len(self._positions)} positions, {len(self._pending)} pending, "
+            f"{account.gross:.2f} gross lots, risk {account.risk:.2f}, {self.open_families} families"
+        )
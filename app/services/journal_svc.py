@@ -0,0 +1,294 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from app.config import config
+from app.log_setup import setup_logger
+from app.models.signal import TradeSignal
+
+logger = setup_logger("SignalJournal")
+
+MessageKey = Tuple[int, int]  # (chat_id, message_id)
+
+
+class SignalJournal:
+    """
+    Append-only journal of received messages, parsed signals and per-leg order intents.
+
+    Every record is flushed to the OS as soon as it is written (survives a process crash);
+    fsync is batched every JOURNAL_FSYNC_INTERVAL_MS (survives a power loss within that window).
+    On startup the journal is compacted down to a checkpoint plus the unfinished messages,
+    which are then reconciled against the terminal and replayed.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or config.JOURNAL_PATH
+        self.running = False
+        self._file = None
+        self._dirty = False
+
+        self.last_ids: Dict[int, int] = {}           # chat_id -> highest message id seen
+        self._watermark: Dict[int, int] = {}         # chat_id -> id up to which all messages are handled or unfinished
+        self._seen: Dict[int, Set[int]] = {}         # chat_id -> message ids seen above the watermark
+        self._open: Dict[MessageKey, dict] = {}      # unfinished messages
+        self._family_keys: Dict[str, MessageKey] = {}
+        self._intents: Dict[str, dict] = {}          # client_id -> intent record
+        self._results: Dict[str, dict] = {}          # client_id -> result record
+        self._broker_legs: Dict[Tuple[str, float], int] = {}  # (family_id, tp) -> orders found on the terminal
+
+    # =====================================================================================
+    # 💾 STORAGE
+    # =====================================================================================
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line_no, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn write at the tail is expected after a crash
+                        logger.warning(f"Skipping corrupt journal line {line_no}.")
+                        continue
+                    self._apply(record)
+
+        self._watermark = dict(self.last_ids)
+        self._compact()
+        self._file = open(self.path, "a", encoding="utf-8")
+        logger.info(f"Journal loaded: {len(self._open)} unfinished messages, {len(self.last_ids)} chats.")
+
+    def _apply(self, record: dict):
+        kind = record.get("kind")
+
+        if kind == "checkpoint":
+            for chat_id, message_id in record["last_ids"].items():
+                self._bump(int(chat_id), message_id)
+            return
+
+        if kind in ("message", "signal", "done"):
+            key = (record["chat_id"], record["message_id"])
+            if kind == "message":
+                self._bump(*key)
+                self._open[key] = {"message": record, "signal": None, "parsed": False}
+                if record.get("family_id"):
+                    self._family_keys[record["family_id"]] = key
+            elif kind == "signal" and key in self._open:
+                self._open[key]["signal"] = record["signal"]
+                self._open[key]["parsed"] = True
+            elif kind == "done":
+                entry = self._open.pop(key, None)
+                family_id = entry["message"].get("family_id") if entry else None
+                if family_id:
+                    self._family_keys.pop(family_id, None)
+                    for client_id in [c for c, i in self._intents.items() if i["family_id"] == family_id]:
+                        del self._intents[client_id]
+                        self._results.pop(client_id, None)
+            return
+
+        if kind == "intent":
+            self._intents[record["client_id"]] = record
+        elif kind == "result":
+            self._results[record["client_id"]] = record
+
+    def _bump(self, chat_id: int, message_id: int):
+        if message_id > self.last_ids.get(chat_id, 0):
+            self.last_ids[chat_id] = message_id
+
+    def _compact(self):
+        """
+        Rewrites the journal as one checkpoint record plus everything still needed for
+        the unfinished messages. Done once at startup, before the file is opened for append.
+        """
+        open_families = set(self._family_keys)
+        self._intents = {k: v for k, v in self._intents.items() if v["family_id"] in open_families}
+        self._results = {k: v for k, v in self._results.items() if k in self._intents}
+
+        records = [{"kind": "checkpoint", "t": time.time(), "last_ids": {str(c): m for c, m in self.last_ids.items()}}]
+        for key, entry in self._open.items():
+            records.append(entry["message"])
+            if entry["parsed"]:
+                records.append({"kind": "signal", "chat_id": key[0], "message_id": key[1], "signal": entry["signal"]})
+        records.extend(self._intents.values())
+        records.extend(self._results.values())
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, record: dict):
+        record.setdefault("t", time.time())
+        self._apply(record)
+        if not self._file:
+            return
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._dirty = True
+
+    def sync(self):
+        if self._file and self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def close(self):
+        self.running = False
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    async def start_loop(self):
+        self.running = True
+        interval = config.JOURNAL_FSYNC_INTERVAL_MS / 1000.0
+        while self.running:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Journal fsync failed: {e}")
+            await asyncio.sleep(interval)
+
+    # =====================================================================================
+    # 📨 MESSAGES & SIGNALS
+    # =====================================================================================
+    @staticmethod
+    def family_id_for(magic_number: int, message_id: Optional[int]) -> str:
+        """
+        Deterministic per message, so a replayed message maps onto the orders it already placed.
+        Kept short: MT5 truncates order comments at 31 characters.
+        """
+        if message_id is None:
+            return f"signal_{time.time_ns()}"
+        return f"signal_{magic_number}_{message_id}"
+
+    def last_message_id(self, chat_id: int) -> Optional[int]:
+        return self.last_ids.get(chat_id)
+
+    def is_seen(self, chat_id: int, message_id: int) -> bool:
+        return (
+            message_id <= self._watermark.get(chat_id, 0)
+            or message_id in self._seen.get(chat_id, ())
+            or (chat_id, message_id) in self._open
+        )
+
+    def record_message(self, chat_id: int, message_id: int, magic_number: int, text: str,
+                       sent_at: Optional[float] = None) -> str:
+        family_id = self.family_id_for(magic_number, message_id)
+        self._seen.setdefault(chat_id, set()).add(message_id)
+        self._append({
+            "kind": "message",
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "magic": magic_number,
+            "sent_at": sent_at,
+            "family_id": family_id,
+            "text": text,
+        })
+        return family_id
+
+    def record_signal(self, chat_id: int, message_id: int, signal: Optional[TradeSignal]):
+        self._append({
+            "kind": "signal",
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "signal": signal.model_dump() if signal else None,
+        })
+
+    def finish(self, chat_id: int, message_id: int, status: str = "done"):
+        self._append({"kind": "done", "chat_id": chat_id, "message_id": message_id, "status": status})
+        self._advance_watermark(chat_id)
+
+    def _advance_watermark(self, chat_id: int):
+        """
+        Moves the chat's watermark up to just below its oldest unfinished message (or to its
+        last id), like the startup compaction does, and drops the seen ids it now covers.
+        """
+        seen = self._seen.get(chat_id)
+        if not seen:
+            return
+        unfinished = [m for c, m in self._open if c == chat_id]
+        watermark = min(unfinished) - 1 if unfinished else self.last_ids.get(chat_id, 0)
+        if watermark <= self._watermark.get(chat_id, 0):
+            return
+        self._watermark[chat_id] = watermark
+        seen.difference_update([m for m in seen if m <= watermark])
+        if not seen:
+            del self._seen[chat_id]
+
+    def unfinished(self) -> List[dict]:
+        """
+        Messages that were received but not fully handled, oldest first. Each entry holds the
+        original message record, whether it was parsed, and the parsed signal (or None).
+        """
+        entries = [
+            {"message": e["message"], "parsed": e["parsed"], "signal": e["signal"]}
+            for e in self._open.values()
+        ]
+        return sorted(entries, key=lambda e: e["message"]["t"])
+
+    # =====================================================================================
+    # 🧾 ORDER INTENTS
+    # =====================================================================================
+    @staticmethod
+    def client_id_for(family_id: str, leg: int) -> str:
+        return f"{family_id}#{leg}"
+
+    def record_intent(self, client_id: str, family_id: str, request: dict):
+        self._append({
+            "kind": "intent",
+            "client_id": client_id,
+            "family_id": family_id,
+            "request": {k: v for k, v in request.items() if isinstance(v, (int, float, str))},
+        })
+
+    def record_result(self, client_id: str, result, done_retcode: int):
+        self._append({
+            "kind": "result",
+            "client_id": client_id,
+            "retcode": result.retcode if result is not None else None,
+            "order": result.order if result is not None else None,
+            "done": result is not None and result.retcode == done_retcode,
+        })
+
+    def leg_placed(self, client_id: str, family_id: str, tp: float) -> bool:
+        """
+        True if this leg already reached the broker, either according to the terminal
+        (found during reconcile) or to a successful result in the journal.
+        """
+        key = (family_id, round(float(tp), 5))
+        if self._broker_legs.get(key, 0) > 0:
+            self._broker_legs[key] -= 1
+            return True
+        result = self._results.get(client_id)
+        return bool(result and result.get("done"))
+
+    def reconcile(self, mt5_service) -> int:
+        """
+        Counts the orders/positions the terminal holds for every unfinished family so legs
+        whose outcome was lost in a crash are never sent twice. Returns the number found.
+        """
+        families = set(self._family_keys)
+        if not families or not mt5_service.connected:
+            return 0
+
+        oldest = min(self._open[key]["message"]["t"] for key in self._family_keys.values())
+        # History is in server time; pad generously and filter by comment
+        history = mt5_service.get_history_orders(oldest - 86400, time.time() + 86400) or []
+
+        seen_tickets = set()
+        self._broker_legs = {}
+        # History first: it holds every order as placed, before any later SL/TP modification
+        for item in list(history) + list(mt5_service.get_orders()) + list(mt5_service.get_positions()):
+            if item.comment not in families or item.ticket in seen_tickets:
+                continue
+            seen_tickets.add(item.ticket)
+            key = (item.comment, round(float(item.tp), 5))
+            self._broker_legs[key] = self._broker_legs.get(key, 0) + 1
+
+        logger.info(f"Reconciled {len(families)} unfinished families: {len(seen_tickets)} orders already on the terminal.")
+        return len(seen_tickets)
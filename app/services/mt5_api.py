@@ -0,0 +1,11 @@
+"""
+The MetaTrader5 API the bot talks to: the real package, or the in-process paper broker
+when BROKER_MODE=paper (which also runs where the MetaTrader5 package is unavailable).
+Import `mt5` from here instead of importing MetaTrader5 directly.
+"""
+from app.config import config
+
+if config.BROKER_MODE == "paper":
+    from app.paper.broker import paper_broker as mt5
+else:
+    import MetaTrader5 as mt5
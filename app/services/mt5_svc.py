@@ -1,4 +1,5 @@
-import MetaTrader5 as mt5
+from app.services.mt5_api import mt5
+from datetime import datetime, timezone
 from app.config import config
 from app.log_setup import setup_logger
 
@@ -53,6 +54,9 @@ class MT5Service:
     def get_tick(self, symbol: str):
         return mt5.symbol_info_tick(symbol)
 
+    def get_ticks_from(self, symbol: str, from_ts: float, count: int):
+        return mt5.copy_ticks_from(symbol, datetime.fromtimestamp(from_ts, tz=timezone.utc), count, mt5.COPY_TICKS_INFO)
+
     def send_order(self, request: dict):
         return mt5.order_send(request)
 
@@ -69,5 +73,24 @@ class MT5Service:
             return [p for p in positions if p.magic == magic]
         return list(positions)
         
+    def get_orders(self, symbol: str = None, magic: int = None):
+        if symbol:
+            orders = mt5.orders_get(symbol=symbol)
+        else:
+            orders = mt5.orders_get()
+
+        if orders is None:
+            return []
+
+        if magic:
+            return [o for o in orders if o.magic == magic]
+        return list(orders)
+
+    def cancel_order(self, ticket: int):
+        return mt5.order_send({"action": mt5.TRADE_ACTION_REMOVE, "order": ticket})
+
     def get_history_deals(self, from_date, to_date):
         return mt5.history_deals_get(from_date, to_date)
+
+    def get_history_orders(self, from_date, to_date):
+        return mt5.history_orders_get(from_date, to_date)
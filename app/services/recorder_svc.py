@@ -0,0 +1,315 @@
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from app.log_setup import setup_logger
+
+logger = setup_logger("MarketRecorder")
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+INITIAL_CAPACITY = 1 << 16
+
+TICK_COLUMNS = {
+    "time_msc": np.int64,
+    "symbol": np.uint16,
+    "bid": np.float64,
+    "ask": np.float64,
+}
+
+EVENT_COLUMNS = {
+    "time_ns": np.int64,
+    "kind": np.uint8,
+    "magic": np.int32,
+    "symbol": np.uint16,
+    "ref_id": np.int64,      # Telegram message id (deal ticket for FILL / CLOSE)
+    "ticket": np.int64,      # order / position ticket
+    "price": np.float64,     # market or fill price (bid for QUOTE)
+    "ref_price": np.float64, # price we asked for (signal entry / request price, ask for QUOTE)
+    "volume": np.float64,
+    "code": np.int32,        # retcode, skip reason or deal reason
+}
+
+# Event kinds
+EVENT_SIGNAL_RECEIVED = 1
+EVENT_SIGNAL_PARSED = 2
+EVENT_SIGNAL_SKIPPED = 3
+EVENT_ORDER_SENT = 4
+EVENT_ORDER_RESULT = 5
+EVENT_FILL = 6    # deal entering a position (market fill or triggered pending)
+EVENT_CLOSE = 7   # deal leaving a position (TP, SL, manual)
+EVENT_QUOTE = 8   # bid/ask the executor decided on (the tick itself is in the tick stream)
+
+# Skip reasons (code of EVENT_SIGNAL_SKIPPED)
+SKIP_TOLERANCE = 1
+SKIP_STOPS_LEVEL = 2
+SKIP_STALE = 3
+SKIP_NOT_A_SIGNAL = 4
+SKIP_EXPOSURE = 5
+
+
+class ColumnStore:
+    """
+    Fixed-width columns, one memory-mapped file per column, plus a one-row count file.
+    Files are preallocated and doubled when full; the count is written after the data,
+    so a reader (or a crash) only ever sees complete rows.
+    """
+
+    def __init__(self, directory: str, columns: Dict[str, type], capacity: int = INITIAL_CAPACITY):
+        self.directory = directory
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        os.makedirs(directory, exist_ok=True)
+
+        schema_path = os.path.join(directory, "schema.json")
+        if not os.path.exists(schema_path):
+            with open(schema_path, "w") as f:
+                json.dump({name: dtype.str for name, dtype in self.columns.items()}, f)
+
+        count_path = os.path.join(directory, "_count.bin")
+        if not os.path.exists(count_path):
+            np.zeros(1, dtype=np.int64).tofile(count_path)
+        self._count = np.memmap(count_path, dtype=np.int64, mode="r+", shape=(1,))
+        self.count = int(self._count[0])
+
+        self.capacity = max(capacity, self.count)
+        self._arrays: Dict[str, np.memmap] = {}
+        self._map(self.capacity)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def _map(self, capacity: int):
+        self._arrays = {}
+        for name, dtype in self.columns.items():
+            path = self._path(name)
+            size = capacity * dtype.itemsize
+            with open(path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            self._arrays[name] = np.memmap(path, dtype=dtype, mode="r+", shape=(capacity,))
+        self.capacity = capacity
+
+    def _reserve(self, rows: int):
+        if self.count + rows <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < self.count + rows:
+            capacity *= 2
+        for array in self._arrays.values():
+            array.flush()
+        # Drop the old maps before growing the files (required on Windows)
+        self._arrays = {}
+        self._map(capacity)
+
+    def append(self, row: Dict[str, float]):
+        self._reserve(1)
+        i = self.count
+        for name, array in self._arrays.items():
+            array[i] = row.get(name, 0)
+        self.count = i + 1
+        self._count[0] = self.count
+
+    def append_many(self, rows: Dict[str, np.ndarray]):
+        n = len(next(iter(rows.values())))
+        if not n:
+            return
+        self._reserve(n)
+        start, end = self.count, self.count + n
+        for name, array in self._arrays.items():
+            array[start:end] = rows.get(name, 0)
+        self.count = end
+        self._count[0] = self.count
+
+    def flush(self):
+        for array in self._arrays.values():
+            array.flush()
+        self._count.flush()
+
+    def close(self):
+        """Flushes and trims the preallocated tail so the files hold exactly `count` rows."""
+        self.flush()
+        self._arrays = {}
+        self._count = None
+        for name, dtype in self.columns.items():
+            with open(self._path(name), "r+b") as f:
+                f.truncate(self.count * dtype.itemsize)
+
+
+def read_columns(directory: str) -> Dict[str, np.ndarray]:
+    """
+    Zero-copy, read-only view of a ColumnStore directory (safe while it is being written).
+    """
+    with open(os.path.join(directory, "schema.json")) as f:
+        schema = json.load(f)
+    count = int(np.fromfile(os.path.join(directory, "_count.bin"), dtype=np.int64, count=1)[0])
+
+    columns = {}
+    for name, dtype_str in schema.items():
+        if count == 0:
+            columns[name] = np.zeros(0, dtype=np.dtype(dtype_str))
+        else:
+            columns[name] = np.memmap(os.path.join(directory, f"{name}.bin"), dtype=np.dtype(dtype_str), mode="r", shape=(count,))
+    return columns
+
+
+def read_day(base_dir: str, day: str, stream: str = "ticks") -> Dict[str, np.ndarray]:
+    """
+    Loads one day ("YYYY-MM-DD") of a stream ("ticks" or "events"). The symbol column is
+    an index into the "symbols" entry of the result.
+    """
+    directory = os.path.join(base_dir, day, stream)
+    columns = read_columns(directory)
+    symbols_path = os.path.join(directory, "symbols.json")
+    symbols = []
+    if os.path.exists(symbols_path):
+        with open(symbols_path) as f:
+            symbols = json.load(f)
+    columns["symbols"] = np.array(symbols)
+    return columns
+
+
+class DailyStream:
+    """
+    A ColumnStore per UTC day (base_dir/YYYY-MM-DD/<name>) with its own symbol table.
+    Each stream rotates on its own clock: tick times come from the broker, events from us.
+    """
+
+    def __init__(self, base_dir: str, name: str, columns: Dict[str, type]):
+        self.base_dir = base_dir
+        self.name = name
+        self.columns = columns
+        self.day: Optional[int] = None
+        self.store: Optional[ColumnStore] = None
+        self.symbols: List[str] = []
+        self.symbol_ids: Dict[str, int] = {}
+
+    def rotate(self, time_ns: int) -> ColumnStore:
+        day = time_ns // NS_PER_DAY
+        if day == self.day:
+            return self.store
+
+        self.close()
+        directory = os.path.join(self.base_dir, time.strftime("%Y-%m-%d", time.gmtime(day * 86_400)), self.name)
+        self.store = ColumnStore(directory, self.columns)
+        self.day = day
+
+        self.symbols = []
+        symbols_path = os.path.join(directory, "symbols.json")
+        if os.path.exists(symbols_path):
+            with open(symbols_path) as f:
+                self.symbols = json.load(f)
+        self.symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+        logger.info(f"Recording {self.name} to {directory}")
+        return self.store
+
+    def symbol_id(self, symbol: str) -> int:
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_ids[symbol] = symbol_id
+            with open(os.path.join(self.store.directory, "symbols.json"), "w") as f:
+                json.dump(self.symbols, f)
+        return symbol_id
+
+    def flush(self):
+        if self.store:
+            self.store.flush()
+
+    def close(self):
+        if self.store:
+            self.store.close()
+        self.store = None
+        self.day = None
+
+
+class MarketRecorder:
+    """
+    Records ticks of traded symbols and an execution event stream into daily-rotated
+    column stores under base_dir/YYYY-MM-DD/{ticks,events}. Appends are plain memory
+    writes, so calling it from the order path costs microseconds.
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self._ticks = DailyStream(base_dir, "ticks", TICK_COLUMNS)
+        self._events = DailyStream(base_dir, "events", EVENT_COLUMNS)
+        self.last_tick_msc: Dict[str, int] = {}
+        self._last_msc_ticks: Dict[str, int] = {}  # ticks recorded at last_tick_msc
+
+    def flush(self):
+        self._ticks.flush()
+        self._events.flush()
+
+    def close(self):
+        self._ticks.close()
+        self._events.close()
+
+    # =====================================================================================
+    # 📈 TICKS
+    # =====================================================================================
+    def record_ticks(self, symbol: str, ticks) -> int:
+        """
+        Appends ticks (MT5 structured array with time_msc/bid/ask) not recorded yet for this
+        symbol. Consecutive pulls overlap: ticks before the last recorded millisecond are
+        dropped, and so are as many ticks at that millisecond as were already recorded
+        (several real ticks can share it). Returns the number of rows written.
+        """
+        if ticks is None or not len(ticks):
+            return 0
+
+        time_msc = np.asarray(ticks["time_msc"], dtype=np.int64)
+        last = self.last_tick_msc.get(symbol, -1)
+        fresh = time_msc > last
+        fresh[np.flatnonzero(time_msc == last)[self._last_msc_ticks.get(symbol, 0):]] = True
+        if not fresh.any():
+            return 0
+        time_msc = time_msc[fresh]
+        bid = np.asarray(ticks["bid"], dtype=np.float64)[fresh]
+        ask = np.asarray(ticks["ask"], dtype=np.float64)[fresh]
+
+        # A batch can straddle midnight: split it per day
+        days = time_msc // (NS_PER_DAY // 1_000_000)
+        written = 0
+        for day in np.unique(days):
+            mask = days == day
+            store = self._ticks.rotate(int(day) * NS_PER_DAY)
+            n = int(mask.sum())
+            store.append_many({
+                "time_msc": time_msc[mask],
+                "symbol": np.full(n, self._ticks.symbol_id(symbol), dtype=np.uint16),
+                "bid": bid[mask],
+                "ask": ask[mask],
+            })
+            written += n
+
+        newest = int(time_msc[-1])
+        at_newest = int((time_msc == newest).sum())
+        if newest == last:
+            at_newest += self._last_msc_ticks.get(symbol, 0)
+        self.last_tick_msc[symbol] = newest
+        self._last_msc_ticks[symbol] = at_newest
+        return written
+
+    # =====================================================================================
+    # 🧾 EVENTS
+    # =====================================================================================
+    def record_event(self, kind: int, magic: int = 0, symbol: str = "", ref_id: int = 0, ticket: int = 0,
+                     price: float = math.nan, ref_price: float = math.nan, volume: float = math.nan, code: int = 0,
+                     time_ns: int = None):
+        # time_ns lets another process's timestamps (e.g. when ingestion received a message) be kept
+        time_ns = time_ns or time.time_ns()
+        store = self._events.rotate(time_ns)
+        store.append({
+            "time_ns": time_ns,
+            "kind": kind,
+            "magic": magic,
+            "symbol": self._events.symbol_id(symbol) if symbol else 0xFFFF,
+            "ref_id": ref_id or 0,
+            "ticket": ticket or 0,
+            "price": price if price is not None else math.nan,
+            "ref_price": ref_price if ref_price is not None else math.nan,
+            "volume": volume if volume is not None else math.nan,
+            "code": code or 0,
+        })
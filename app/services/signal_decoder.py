@@ -0,0 +1,55 @@
+import json
+from typing import Optional
+from app.log_setup import setup_logger
+from app.models.signal import TradeSignal
+
+logger = setup_logger("SignalDecoder")
+
+def decode_signal_response(result_json: Optional[str]) -> Optional[TradeSignal]:
+    """
+    Turns a raw LLM response into a TradeSignal (or None if it is not a signal).
+    Kept free of config/network so recorded responses can be replayed offline.
+    """
+    if result_json is None:
+        logger.error("Empty message content from model.")
+        return None
+
+    result_json = result_json.strip()
+
+    # Clean markdown if included (models sometimes ignore the JSON format request)
+    if result_json.startswith("```"):
+        result_json = (
+            result_json.replace("```json", "")
+            .replace("```", "")
+            .strip()
+        )
+
+    # Check for null signal responses
+    if result_json.lower() == "null" or not result_json:
+        logger.info("Not a valid trading signal.")
+        return None
+
+    # Convert to Python dict
+    try:
+        signal_data = json.loads(result_json)
+    except json.JSONDecodeError as e:
+        logger.error(f"Parsing Error: {e}")
+        return None
+
+    # Unwrap if the model wraps the JSON in a top-level key (e.g., {"signal": {...}})
+    if isinstance(signal_data, dict) and 'signal' in signal_data and signal_data.keys() == {'signal'}:
+        signal_data = signal_data['signal']
+
+    if signal_data is None:
+        logger.info("Not a valid trading signal.")
+        return None
+
+    # Validate with Pydantic
+    try:
+        signal = TradeSignal(**signal_data)
+        logger.info(f"Parsed: {signal}")
+        return signal
+    except Exception:
+        # Don't print huge errors for chatter. Just log a simple warning.
+        logger.warning(f"Ignored message: AI parsed data but it was incomplete (likely not a signal).")
+        return None
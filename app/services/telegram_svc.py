@@ -1,7 +1,7 @@
 from telethon import TelegramClient, events
 from app.config import config
 from app.log_setup import setup_logger
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Optional
 
 logger = setup_logger("TelegramService")
 
@@ -21,9 +21,14 @@ CHAT_ID_TO_MAGIC_MAP = {
 }
 
 class TelegramBot:
-    def __init__(self, callback: Callable[[str, int], Awaitable[None]]):
+    def __init__(self, callback: Callable[[str, int, int, int, Optional[float]], Awaitable[None]], journal=None):
+        """
+        callback(text, magic_number, chat_id, message_id, sent_at) is invoked for every message.
+        With a journal, messages missed while the bot was down are fetched on startup.
+        """
         self.client = TelegramClient('bot_session', config.API_ID, config.API_HASH)
         self.callback = callback
+        self.journal = journal
 
     async def start(self):
         logger.info("Bot is starting...")
@@ -37,21 +42,45 @@ class TelegramBot:
             
         logger.info(f"Listening for messages in: {len(chat_ids_to_listen)} groups (by ID)")
         await self.client.start(phone=config.PHONE)
+        if self.journal:
+            await self._catch_up()
         await self.client.run_until_disconnected()
 
+    async def _catch_up(self):
+        """
+        Bulk-fetches messages posted since the last id we saw in each chat and feeds them,
+        oldest first, through the callback. The pipeline decides what is still fresh.
+        """
+        for chat_id in CHAT_ID_TO_MAGIC_MAP:
+            last_id = self.journal.last_message_id(chat_id)
+            if last_id is None:
+                # Never seen this chat: nothing to catch up on
+                continue
+
+            try:
+                messages = await self.client.get_messages(chat_id, min_id=last_id, limit=config.CATCHUP_LIMIT)
+            except Exception as e:
+                logger.error(f"Catch-up failed for chat {chat_id}: {e}")
+                continue
+
+            if messages:
+                logger.info(f"Catching up on {len(messages)} missed messages in chat {chat_id}")
+            for message in reversed(messages):
+                await self._dispatch(chat_id, message)
+
     async def _signal_handler(self, event):
-        message_text = event.raw_text
-        chat_id = event.chat_id
-        
-        logger.info(f"New Message from chat ID: {chat_id}")
-        
+        logger.info(f"New Message from chat ID: {event.chat_id}")
+        await self._dispatch(event.chat_id, event.message)
+
+    async def _dispatch(self, chat_id: int, message):
         magic_number = CHAT_ID_TO_MAGIC_MAP.get(chat_id)
         if not magic_number:
             logger.warning(f"SKIPPED: Message from unknown group ID {chat_id}.")
             return
 
+        sent_at = message.date.timestamp() if message.date else None
         try:
             # Invoke the callback (pipeline)
-            await self.callback(message_text, magic_number)
+            await self.callback(message.raw_text or "", magic_number, chat_id, message.id, sent_at)
         except Exception as e:
             logger.error(f"Error processing message: {e}")
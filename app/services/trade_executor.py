@@ -1,17 +1,29 @@
 import time
-import MetaTrader5 as mt5
+from app.services.mt5_api import mt5
 from app.config import config
 from app.log_setup import setup_logger
 from app.models.signal import TradeSignal
 from app.services.mt5_svc import MT5Service
+from app.services.recorder_svc import (
+    EVENT_ORDER_RESULT, EVENT_ORDER_SENT, EVENT_QUOTE, EVENT_SIGNAL_SKIPPED, SKIP_EXPOSURE, SKIP_STOPS_LEVEL, SKIP_TOLERANCE
+)
 
 logger = setup_logger("TradeExecutor")
 
 class TradeExecutor:
-    def __init__(self, mt5_service: MT5Service):
+    def __init__(self, mt5_service: MT5Service, order_manager=None, journal=None, recorder=None, ledger=None):
         self.mt5 = mt5_service
+        # Optional PendingOrderManager that expires/cancels the pending legs we place
+        self.order_manager = order_manager
+        # Optional SignalJournal recording every leg before/after it is sent
+        self.journal = journal
+        # Optional MarketRecorder for ticks seen at order time and execution events
+        self.recorder = recorder
+        # Optional ExposureLedger enforcing pre-trade exposure limits
+        self.ledger = ledger
 
-    def execute_signal(self, signal: TradeSignal, magic_number: int):
+    def execute_signal(self, signal: TradeSignal, magic_number: int, family_id: str = None,
+                       message_id: int = None):
         try:
             if not self.mt5.connected:
                 if not self.mt5.connect():
@@ -27,7 +39,7 @@ class TradeExecutor:
 
             # --- NEW TRADES ---
             if action in ["BUY", "SELL"]:
-                self._handle_new_trade(signal, magic_number)
+                self._handle_new_trade(signal, magic_number, family_id, message_id)
             
             # --- MODIFY TRADES ---
             elif action == "MODIFY":
@@ -36,7 +48,64 @@ class TradeExecutor:
         except Exception as e:
             logger.error(f"Execution Error: {e}")
 
-    def _handle_new_trade(self, signal: TradeSignal, magic_number: int):
+    def _record(self, kind: int, **fields):
+        if not self.recorder:
+            return
+        try:
+            self.recorder.record_event(kind, **fields)
+        except Exception as e:
+            logger.error(f"Recorder error: {e}")
+
+    def _within_limits(self, signal: TradeSignal, magic_number: int, family_id: str, price: float,
+                       symbol_info, message_id: int = None) -> bool:
+        """
+        Pre-trade exposure check for the whole basket (one leg per TP), against the ledger only.
+        """
+        if not self.ledger:
+            return True
+
+        legs = len(signal.tp_list or [])
+        lots = config.FIXED_LOT_SIZE * legs
+        direction = 1 if signal.action == "BUY" else -1
+        distance = max((price - float(signal.sl)) * direction, 0.0) if signal.sl else 0.0
+        risk = distance * lots * self.ledger.value_per_price(signal.symbol, symbol_info)
+
+        reason = self.ledger.check(signal.symbol, magic_number, direction, lots, risk, family_id)
+        if reason:
+            logger.warning(f"SKIPPED: Exposure limit reached ({reason}).")
+            self._record(EVENT_SIGNAL_SKIPPED, magic=magic_number, symbol=signal.symbol, ref_id=message_id,
+                         price=price, volume=lots, code=SKIP_EXPOSURE)
+            return False
+        return True
+
+    def _send_leg(self, request: dict, family_id: str, leg: int, message_id: int = None):
+        """
+        Sends one leg of a basket. With a journal, the intent is recorded first and legs the
+        broker already holds (e.g. after a crash/replay) are skipped. Returns None if skipped.
+        """
+        client_id = None
+        if self.journal:
+            client_id = self.journal.client_id_for(family_id, leg)
+            if self.journal.leg_placed(client_id, family_id, request["tp"]):
+                logger.info(f"SKIPPED leg {client_id}: already placed.")
+                return None
+            self.journal.record_intent(client_id, family_id, request)
+
+        event = dict(magic=request["magic"], symbol=request["symbol"], ref_id=message_id)
+        self._record(EVENT_ORDER_SENT, price=request["price"], volume=request["volume"], code=request["type"], **event)
+        result = self.mt5.send_order(request)
+        if result is not None:
+            self._record(
+                EVENT_ORDER_RESULT, ticket=result.order, price=result.price, ref_price=request["price"],
+                volume=result.volume, code=result.retcode, **event
+            )
+
+        if self.journal:
+            self.journal.record_result(client_id, result, mt5.TRADE_RETCODE_DONE)
+        return result
+
+    def _handle_new_trade(self, signal: TradeSignal, magic_number: int, family_id: str = None,
+                          message_id: int = None):
         symbol = signal.symbol
         action = signal.action
         order_type_str = signal.order_type
@@ -47,7 +116,8 @@ class TradeExecutor:
         
         sl = signal.sl
         lot_size = config.FIXED_LOT_SIZE
-        family_id = f"signal_{int(time.time())}"
+        # Unique per signal; MT5 keeps at most 31 characters of the comment
+        family_id = family_id or f"signal_{time.time_ns()}"
 
         # ==============================================================================
         # MARKET ORDERS
@@ -64,7 +134,9 @@ class TradeExecutor:
             if not tick:
                 logger.error(f"Failed to get tick for {symbol}")
                 return
-                
+            self._record(EVENT_QUOTE, magic=magic_number, symbol=symbol, ref_id=message_id,
+                         price=tick.bid, ref_price=tick.ask)
+
             if action == "BUY": price = tick.ask
             else: price = tick.bid
 
@@ -80,21 +152,30 @@ class TradeExecutor:
                     valid_max = max_entry + TOLERANCE
                     if not (valid_min <= price <= valid_max):
                         logger.warning(f"SKIPPED: Price {price} outside {valid_min}-{valid_max}.")
+                        self._record(EVENT_SIGNAL_SKIPPED, magic=magic_number, symbol=symbol, ref_id=message_id,
+                                     price=price, ref_price=(min_entry + max_entry) / 2, code=SKIP_TOLERANCE)
                         return
                 elif len(entry_range) == 1:
                     target_price = entry_range[0]
                     if action == "BUY":
                         if price > (target_price + TOLERANCE):
                             logger.warning(f"SKIPPED: Price {price} too high above {target_price}.")
+                            self._record(EVENT_SIGNAL_SKIPPED, magic=magic_number, symbol=symbol, ref_id=message_id,
+                                         price=price, ref_price=target_price, code=SKIP_TOLERANCE)
                             return
                     elif action == "SELL":
                         if price < (target_price - TOLERANCE):
                             logger.warning(f"SKIPPED: Price {price} too low below {target_price}.")
+                            self._record(EVENT_SIGNAL_SKIPPED, magic=magic_number, symbol=symbol, ref_id=message_id,
+                                         price=price, ref_price=target_price, code=SKIP_TOLERANCE)
                             return
                     logger.info(f"Price {price} accepted within tolerance of {target_price}.")
 
+            if not self._within_limits(signal, magic_number, family_id, price, symbol_info, message_id):
+                return
+
             logger.info(f"Placing {len(tp_list)} MARKET trades for {action} {symbol}")
-            for tp in tp_list:
+            for leg, tp in enumerate(tp_list):
                 trade_request = {
                     "action": mt5.TRADE_ACTION_DEAL,
                     "symbol": symbol, "volume": lot_size,
@@ -103,11 +184,20 @@ class TradeExecutor:
                     "deviation": 20, "magic": magic_number, "comment": family_id,
                     "type_time": mt5.ORDER_TIME_GTC, "type_filling": mt5.ORDER_FILLING_FOK,
                 }
-                result = self.mt5.send_order(trade_request)
+                result = self._send_leg(trade_request, family_id, leg, message_id)
+                if result is None:
+                    continue
                 if result.retcode != mt5.TRADE_RETCODE_DONE: 
                     logger.error(f"FAILED TP {tp}: {result.comment} ({result.retcode})")
                 else: 
                     logger.info(f"PLACED TP {tp}. Order: {result.order}")
+                    if self.order_manager:
+                        self.order_manager.track_position(result.order, family_id)
+                    if self.ledger:
+                        self.ledger.on_open(
+                            result.order, symbol, magic_number, family_id, action == "BUY",
+                            result.volume or lot_size, result.price or price, sl, symbol_info
+                        )
 
         # ==============================================================================
         # PENDING ORDERS (BUY_LIMIT, SELL_LIMIT, BUY_STOP, SELL_STOP)
@@ -131,6 +221,8 @@ class TradeExecutor:
             if not tick:
                 logger.error(f"Tick not found for {symbol}")
                 return
+            self._record(EVENT_QUOTE, magic=magic_number, symbol=symbol, ref_id=message_id,
+                         price=tick.bid, ref_price=tick.ask)
 
             # Broker's minimum stop distance (Stops Level)
             # trade_stops_level is usually in points. We convert to price.
@@ -170,6 +262,9 @@ class TradeExecutor:
                         is_valid_dist = False
             
             if not is_valid_dist:
+                self._record(EVENT_SIGNAL_SKIPPED, magic=magic_number, symbol=symbol, ref_id=message_id,
+                             price=current_ask if "BUY" in order_type_str else current_bid, ref_price=price,
+                             code=SKIP_STOPS_LEVEL)
                 return
             # ---------------------------------------
 
@@ -180,9 +275,12 @@ class TradeExecutor:
             elif order_type_str == "BUY_STOP": mt5_type = mt5.ORDER_TYPE_BUY_STOP
             elif order_type_str == "SELL_STOP": mt5_type = mt5.ORDER_TYPE_SELL_STOP
             
+            if not self._within_limits(signal, magic_number, family_id, price, symbol_info, message_id):
+                return
+
             logger.info(f"Placing {len(tp_list)} pending trades at {price} for {symbol}")
             
-            for tp in tp_list:
+            for leg, tp in enumerate(tp_list):
                 trade_request = {
                     "action": mt5.TRADE_ACTION_PENDING,
                     "symbol": symbol,
@@ -198,12 +296,21 @@ class TradeExecutor:
                     "type_filling": mt5.ORDER_FILLING_RETURN,
                 }
                 
-                result = self.mt5.send_order(trade_request)
-                
+                result = self._send_leg(trade_request, family_id, leg, message_id)
+                if result is None:
+                    continue
+
                 if result.retcode != mt5.TRADE_RETCODE_DONE:
                     logger.error(f"FAILED {order_type_str} TP {tp}: {result.comment} ({result.retcode})")
                 else:
                     logger.info(f"PLACED {order_type_str} TP {tp}. Order: {result.order}")
+                    if self.order_manager:
+                        self.order_manager.track_order(result.order, family_id, magic_number, symbol)
+                    if self.ledger:
+                        self.ledger.on_pending(
+                            result.order, symbol, magic_number, family_id, action == "BUY",
+                            lot_size, price, sl, symbol_info
+                        )
 
         else:
             logger.error(f"Unrecognized order type: {order_type_str}")
@@ -229,9 +336,12 @@ class TradeExecutor:
                 if position.type == mt5.POSITION_TYPE_BUY:
                     new_sl = position.price_open + profit_buffer
                     if new_sl < position.price_open: new_sl = position.price_open
+                    # Never loosen a SL that is already past BE (e.g. trailed)
+                    if position.sl and position.sl > new_sl: new_sl = position.sl
                 else:
                     new_sl = position.price_open - profit_buffer
                     if new_sl > position.price_open: new_sl = position.price_open
+                    if position.sl and position.sl < new_sl: new_sl = position.sl
                     
             elif order_type_str == "MOVE_SL":
                 new_sl = signal.value
@@ -251,5 +361,7 @@ class TradeExecutor:
             result = self.mt5.send_order(request)
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 logger.info(f"Modified ticket {position.ticket}")
+                if self.ledger:
+                    self.ledger.on_sl_change(position.ticket, new_sl)
             else:
                 logger.error(f"Modify failed: {result.comment}")
\ No newline at end of file
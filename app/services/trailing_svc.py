@@ -0,0 +1,161 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from app.models.trailing import TrailingRule
+
+
+class SymbolSpec(NamedTuple):
+    point: float
+    stops_level: int
+    volume_min: float
+    volume_step: float
+
+
+class TrailingDecision(NamedTuple):
+    sl_index: np.ndarray        # positions whose SL must be modified
+    new_sl: np.ndarray          # new SL for each entry of sl_index
+    partial_index: np.ndarray   # positions that must be partially closed
+    partial_volume: np.ndarray  # volume to close for each entry of partial_index
+    skip_index: np.ndarray      # positions due a partial close that is too small to split
+
+
+class TrailingEngine:
+    """
+    Array-backed state of all open positions. Every price update is evaluated for all
+    positions in one vectorized pass; only positions whose SL improves by more than the
+    configured threshold (or that reach their partial-close level) come out of it.
+    """
+
+    def __init__(self, rule_for: Callable[[int], TrailingRule], min_change_points: float):
+        self.rule_for = rule_for
+        self.min_change_points = min_change_points
+
+        self.symbols: List[str] = []
+        self.tickets: List[int] = []
+        self.positions: List = []
+        # Partial closes already done survive reloads (the reloaded volume is smaller)
+        self._partial_done_tickets = set()
+        self._load_empty()
+
+    def _load_empty(self):
+        self.symbols, self.tickets, self.positions = [], [], []
+        self.sym = np.zeros(0, dtype=np.int32)
+        self.is_buy = np.zeros(0, dtype=bool)
+        self.open = np.zeros(0)
+        self.sl = np.zeros(0)
+        self.volume = np.zeros(0)
+        self.point = np.ones(0)
+        self.stops = np.zeros(0)
+        self.min_change = np.zeros(0)
+        self.activation = np.zeros(0)
+        self.trail = np.zeros(0)
+        self.step = np.zeros(0)
+        self.partial_at = np.zeros(0)
+        self.partial_fraction = np.zeros(0)
+        self.partial_done = np.zeros(0, dtype=bool)
+        self.volume_min = np.zeros(0)
+        self.volume_step = np.ones(0)
+
+    def __len__(self):
+        return len(self.tickets)
+
+    # =====================================================================================
+    # 📥 STATE
+    # =====================================================================================
+    def load(self, positions: Sequence, specs: Dict[str, SymbolSpec], buy_type: int):
+        """
+        Rebuilds the arrays from MT5 positions. Positions whose symbol has no spec are skipped.
+        """
+        positions = [p for p in positions if p.symbol in specs]
+        if not positions:
+            self._load_empty()
+            self._partial_done_tickets.clear()
+            return
+
+        self.positions = positions
+        self.tickets = [p.ticket for p in positions]
+        self.symbols = sorted({p.symbol for p in positions})
+        sym_index = {s: i for i, s in enumerate(self.symbols)}
+        rules = [self.rule_for(p.magic) for p in positions]
+        spec = [specs[p.symbol] for p in positions]
+
+        self.sym = np.fromiter((sym_index[p.symbol] for p in positions), dtype=np.int32, count=len(positions))
+        self.is_buy = np.fromiter((p.type == buy_type for p in positions), dtype=bool, count=len(positions))
+        self.open = np.array([p.price_open for p in positions], dtype=np.float64)
+        self.sl = np.array([p.sl for p in positions], dtype=np.float64)
+        self.volume = np.array([p.volume for p in positions], dtype=np.float64)
+
+        self.point = np.array([s.point for s in spec], dtype=np.float64)
+        self.stops = np.array([s.stops_level for s in spec], dtype=np.float64) * self.point
+        self.volume_min = np.array([s.volume_min for s in spec], dtype=np.float64)
+        self.volume_step = np.array([s.volume_step or s.volume_min or 0.01 for s in spec], dtype=np.float64)
+        self.min_change = self.min_change_points * self.point
+
+        self.activation = np.array([r.activation_points for r in rules], dtype=np.float64) * self.point
+        self.trail = np.array([r.trail_points for r in rules], dtype=np.float64) * self.point
+        self.step = np.array([r.step_points for r in rules], dtype=np.float64) * self.point
+        self.partial_at = np.array([r.partial_close_points for r in rules], dtype=np.float64) * self.point
+        self.partial_fraction = np.array([r.partial_close_fraction for r in rules], dtype=np.float64)
+
+        self._partial_done_tickets.intersection_update(self.tickets)
+        self.partial_done = np.fromiter(
+            (t in self._partial_done_tickets for t in self.tickets), dtype=bool, count=len(self.tickets)
+        )
+
+    def set_sl(self, index: int, sl: float):
+        self.sl[index] = sl
+
+    def mark_partial_done(self, index: int, closed_volume: Optional[float] = None):
+        self.partial_done[index] = True
+        self._partial_done_tickets.add(self.tickets[index])
+        if closed_volume:
+            self.volume[index] -= closed_volume
+
+    # =====================================================================================
+    # ⚡ EVALUATION
+    # =====================================================================================
+    def evaluate(self, bids: np.ndarray, asks: np.ndarray) -> TrailingDecision:
+        """
+        bids/asks are indexed like self.symbols. NaN prices (no tick) disable the positions
+        of that symbol for this pass. Pure: the caller applies the decision to the engine.
+        """
+        if not len(self):
+            empty = np.zeros(0, dtype=np.intp)
+            return TrailingDecision(empty, np.zeros(0), empty, np.zeros(0), empty)
+
+        buy = self.is_buy
+        bid = bids[self.sym]
+        ask = asks[self.sym]
+        priced = np.isfinite(bid) & np.isfinite(ask)
+
+        # Distance in profit, measured at the closing side of the book
+        profit = np.where(buy, bid - self.open, self.open - ask)
+
+        # --- Trailing / step-trailing SL ---
+        offset = profit - self.trail
+        stepping = self.step > 0
+        offset = np.where(stepping, np.floor(offset / np.where(stepping, self.step, 1.0)) * self.step, offset)
+        candidate = np.where(buy, self.open + offset, self.open - offset)
+        # Keep the broker's minimum stop distance from the market
+        candidate = np.where(buy, np.minimum(candidate, bid - self.stops), np.maximum(candidate, ask + self.stops))
+        candidate = np.round(candidate / self.point) * self.point
+
+        has_sl = self.sl > 0
+        improvement = np.where(buy, candidate - self.sl, np.where(has_sl, self.sl - candidate, np.inf))
+        move = (
+            priced
+            & (self.trail > 0)
+            & (profit >= self.activation)
+            & (candidate > 0)
+            & (improvement > self.min_change)
+        )
+
+        # --- Partial close ---
+        wants_partial = priced & ~self.partial_done & (self.partial_at > 0) & (profit >= self.partial_at)
+        close_volume = np.floor(self.volume * self.partial_fraction / self.volume_step + 1e-9) * self.volume_step
+        close_volume = np.round(close_volume, 8)
+        feasible = (close_volume >= self.volume_min) & (self.volume - close_volume >= self.volume_min - 1e-9)
+
+        sl_index = np.flatnonzero(move)
+        partial_index = np.flatnonzero(wants_partial & feasible)
+        skip_index = np.flatnonzero(wants_partial & ~feasible)
+        return TrailingDecision(sl_index, candidate[sl_index], partial_index, close_volume[partial_index], skip_index)
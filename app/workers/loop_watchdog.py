@@ -0,0 +1,224 @@
+"""
+Event-loop watchdog and profiler control endpoint.
+
+Trigger a profile of a running bot (writes PROFILER_OUTPUT_DIR/profile_<pid>_<time>.folded):
+
+    python -m app.workers.loop_watchdog profile 30
+    kill -USR1 <pid>                                 (Linux / macOS)
+
+Render it with flamegraph.pl, inferno or https://www.speedscope.app.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+from app.config import config
+from app.log_setup import setup_logger
+from app.pipeline.channel import offset_address, parse_address
+from app.services.profiler_svc import SamplingProfiler, attribute, format_stack
+
+logger = setup_logger("LoopWatchdog")
+
+
+class LoopWatchdog:
+    """
+    A heartbeat coroutine measures how late the loop wakes it up (lag). A watcher thread
+    notices when the heartbeat is overdue by more than LOOP_LAG_THRESHOLD_MS and samples
+    the loop thread's stack while it is blocked, so the stall is attributed to the
+    function that caused it. The watcher never logs (the stall may be inside a logging
+    handler): the heartbeat reports the samples once the loop is free again. Also serves
+    the on-demand profiler (endpoint / SIGUSR1).
+    """
+
+    def __init__(self, name: str = "main", address: Optional[str] = None):
+        self.name = name
+        self.address = config.PROFILER_ADDRESS if address is None else address
+        self.interval = config.LOOP_HEARTBEAT_MS / 1000.0
+        self.threshold = config.LOOP_LAG_THRESHOLD_MS / 1000.0
+        self.profiler = SamplingProfiler(config.PROFILER_OUTPUT_DIR, config.PROFILER_SAMPLE_MS)
+        self.running = False
+
+        self.lags = deque(maxlen=10_000)  # ms
+        self.stalls = 0
+        self._last_beat = time.perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stall_samples = Counter()
+        self._stall_stack: Optional[str] = None  # stack of the first sample of the current stall
+        self._stop = threading.Event()
+
+    # =====================================================================================
+    # 💓 HEARTBEAT
+    # =====================================================================================
+    async def start_loop(self):
+        self.running = True
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._install_signal()
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        tasks = [self._heartbeat()]
+        if self.address:
+            tasks.append(self._serve())
+        logger.info(f"Watching event loop '{self.name}' (threshold {config.LOOP_LAG_THRESHOLD_MS:.0f}ms)")
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self._stop.set()
+
+    async def _heartbeat(self):
+        next_report = time.perf_counter() + config.LOOP_LAG_REPORT_SECONDS
+        while self.running:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._last_beat = now
+            self._observe(now - started - self.interval)
+
+            if config.LOOP_LAG_REPORT_SECONDS and now >= next_report:
+                self.report()
+                next_report = now + config.LOOP_LAG_REPORT_SECONDS
+
+    def _observe(self, lag: float):
+        self.lags.append(lag * 1000.0)
+        if lag < self.threshold:
+            return
+
+        self.stalls += 1
+        with self._lock:
+            samples, self._stall_samples = self._stall_samples, Counter()
+            stack, self._stall_stack = self._stall_stack, None
+        if samples:
+            culprit, hits = samples.most_common(1)[0]
+            where = f"in {culprit} ({hits}/{sum(samples.values())} samples)\n{stack}"
+        else:
+            where = "(ended before a stack was captured)"
+        logger.warning(f"Event loop '{self.name}' blocked for {lag * 1000:.0f}ms {where}")
+
+    def stats(self) -> dict:
+        if not self.lags:
+            return {"n": 0, "stalls": self.stalls}
+        ordered = sorted(self.lags)
+        return {
+            "n": len(ordered),
+            "p50_ms": statistics.median(ordered),
+            "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            "max_ms": ordered[-1],
+            "stalls": self.stalls,
+        }
+
+    def report(self):
+        s = self.stats()
+        if s["n"]:
+            logger.info(
+                f"Loop lag '{self.name}': p50={s['p50_ms']:.1f}ms p99={s['p99_ms']:.1f}ms "
+                f"max={s['max_ms']:.1f}ms stalls={s['stalls']}"
+            )
+
+    # =====================================================================================
+    # 🔍 STALL CAPTURE (watcher thread)
+    # =====================================================================================
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            if time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            culprit = attribute(frame)
+            # First sample of this stall: keep its stack for the report
+            stack = format_stack(frame) if self._stall_stack is None else None
+            del frame
+            with self._lock:
+                self._stall_samples[culprit] += 1
+                if stack is not None and self._stall_stack is None:
+                    self._stall_stack = stack
+
+    # =====================================================================================
+    # 🎛️ PROFILER CONTROL
+    # =====================================================================================
+    def profile(self, seconds: Optional[float] = None) -> Optional[str]:
+        path = self.profiler.start(seconds or config.PROFILER_DEFAULT_SECONDS)
+        if path is None:
+            logger.warning("A profile is already running.")
+        return path
+
+    def _install_signal(self):
+        if not hasattr(signal, "SIGUSR1"):
+            return  # Windows: use the endpoint
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.profile)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
+
+    async def _serve(self):
+        """Line protocol: "profile [seconds]" or "lag"."""
+        async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                parts = (await reader.readline()).decode(errors="ignore").split()
+                command = parts[0].lower() if parts else ""
+                if command == "profile":
+                    path = self.profile(float(parts[1]) if len(parts) > 1 else None)
+                    reply = f"profiling -> {path}" if path else "busy: a profile is already running"
+                elif command == "lag":
+                    reply = " ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in self.stats().items())
+                else:
+                    reply = "commands: profile [seconds] | lag"
+                writer.write((reply + "\n").encode())
+                await writer.drain()
+            except Exception as e:
+                logger.error(f"Profiler endpoint error: {e}")
+            finally:
+                writer.close()
+
+        kind, target = parse_address(self.address)
+        try:
+            if kind == "unix":
+                if os.path.exists(target):
+                    os.unlink(target)  # stale socket from a previous run
+                server = await asyncio.start_unix_server(on_connection, path=target)
+            else:
+                server = await asyncio.start_server(on_connection, host=target[0], port=target[1])
+        except OSError as e:
+            logger.error(f"Profiler endpoint {self.address} unavailable: {e}")
+            return
+
+        logger.info(f"Profiler endpoint on {self.address}")
+        async with server:
+            await server.serve_forever()
+
+
+async def _request(address: str, command: str) -> str:
+    kind, target = parse_address(address)
+    if kind == "unix":
+        reader, writer = await asyncio.open_unix_connection(path=target)
+    else:
+        reader, writer = await asyncio.open_connection(host=target[0], port=target[1])
+    writer.write((command + "\n").encode())
+    await writer.drain()
+    reply = (await reader.readline()).decode().strip()
+    writer.close()
+    return reply
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control the profiler of a running bot.")
+    parser.add_argument("command", choices=["profile", "lag"])
+    parser.add_argument("seconds", nargs="?", type=float, default=None)
+    parser.add_argument("--address", default=config.PROFILER_ADDRESS)
+    parser.add_argument("--stage", type=int, default=0, help="Multi mode: 0 execution, 1 parser, 2 ingestion")
+    args = parser.parse_args(argv)
+
+    command = args.command if args.seconds is None else f"{args.command} {args.seconds:g}"
+    print(asyncio.run(_request(offset_address(args.address, args.stage), command)))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,12 @@ import asyncio
 import time
 import csv
 import os
-import MetaTrader5 as mt5
+from app.services.mt5_api import mt5
 from datetime import datetime
 from app.log_setup import setup_logger
 from app.services.trade_executor import TradeExecutor
 from app.models.signal import TradeSignal
+from app.services.recorder_svc import EVENT_CLOSE, EVENT_FILL
 
 logger = setup_logger("MonitorWorker")
 
@@ -16,6 +17,9 @@ class MonitorWorker:
     def __init__(self, executor: TradeExecutor):
         self.executor = executor
         self.mt5 = executor.mt5
+        self.order_manager = executor.order_manager
+        self.recorder = executor.recorder
+        self.ledger = executor.ledger
         self.running = False
         self.last_check_time = time.time()
 
@@ -57,12 +61,38 @@ class MonitorWorker:
 
         deals = self.mt5.get_history_deals(from_time, to_time)
 
+        # Feed fills/closes to the pending order manager (sibling cancellation)
+        if self.order_manager:
+            self.order_manager.on_deals(deals)
+        if self.ledger:
+            self.ledger.on_deals(deals)
+            # Reservations of orders cancelled by hand or expired on the broker side
+            window = self.ledger.history_window(to_time)
+            if window:
+                self.ledger.on_history_orders(self.mt5.get_history_orders(*window))
+
+        if deals and self.recorder:
+            self._record_deals(deals)
+
         if deals:
             for deal in deals:
                 # Only entry-out deals & trades made by bot
                 if deal.entry == mt5.DEAL_ENTRY_OUT and deal.magic > 0:
                     self._log_deal_to_csv(deal)
 
+    def _record_deals(self, deals):
+        for deal in deals:
+            if deal.magic <= 0:
+                continue
+            kind = EVENT_FILL if deal.entry == mt5.DEAL_ENTRY_IN else EVENT_CLOSE
+            try:
+                self.recorder.record_event(
+                    kind, magic=deal.magic, symbol=deal.symbol, ref_id=deal.ticket,
+                    ticket=deal.position_id, price=deal.price, volume=deal.volume, code=deal.reason
+                )
+            except Exception as e:
+                logger.error(f"Recorder error: {e}")
+
     def _log_deal_to_csv(self, deal):
         # Determine exit reason
         reason = "MANUAL/OTHER"
@@ -103,6 +133,11 @@ class MonitorWorker:
 
         # 1️⃣ Fetch open positions
         open_positions = self.mt5.get_positions()
+
+        # Positions were fetched anyway: use them to correct any drift of the exposure ledger
+        if self.ledger:
+            self.ledger.resync_positions(open_positions)
+
         if not open_positions:
             return
 
@@ -145,7 +180,12 @@ class MonitorWorker:
             needs_update = False
             for position in positions:
                 entry_price = position.price_open
-                if abs(position.sl - entry_price) > 0.00001:
+                # Only positions whose SL is not yet at/beyond entry: a trailed SL must stay
+                if position.type == mt5.POSITION_TYPE_BUY:
+                    below_be = not position.sl or position.sl < entry_price - 0.00001
+                else:
+                    below_be = not position.sl or position.sl > entry_price + 0.00001
+                if below_be:
                     needs_update = True
                     break
 
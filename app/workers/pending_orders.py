@@ -0,0 +1,272 @@
+import asyncio
+import heapq
+import time
+from app.services.mt5_api import mt5
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.config import config
+from app.log_setup import setup_logger
+from app.services.mt5_svc import MT5Service
+
+logger = setup_logger("PendingOrderManager")
+
+MAX_SLEEP_SECONDS = 60.0
+RETRY_DELAY_SECONDS = 5.0
+MAX_CANCEL_ATTEMPTS = 5
+SERVER_OFFSET_STEP_SECONDS = 1800.0
+MAX_SERVER_OFFSET_SECONDS = 14 * 3600.0  # beyond this the tick is stale (e.g. weekend)
+
+
+@dataclass
+class PendingOrder:
+    ticket: int
+    family_id: str
+    magic: int
+    symbol: str
+    expires_at: float
+    attempts: int = 0
+
+
+class PendingOrderManager:
+    """
+    Keeps every pending order placed by the bot in a timer heap keyed by its expiry
+    and cancels it when its TTL runs out, at session close, or when its signal family
+    is stopped out / completed. Broker state is learnt from order_send results and
+    the deal stream the MonitorWorker already fetches, never by scanning orders_get().
+    """
+
+    def __init__(self, mt5_service: MT5Service, clock: Callable[[], float] = time.time, ledger=None):
+        self.mt5 = mt5_service
+        self.clock = clock
+        # Optional ExposureLedger, released when we cancel an order
+        self.ledger = ledger
+        self.running = False
+
+        self._heap: List[Tuple[float, int]] = []      # (expires_at, ticket), stale entries skipped lazily
+        self._orders: Dict[int, PendingOrder] = {}     # ticket -> live pending order
+        self._families: Dict[str, Set[int]] = {}       # family_id -> live pending tickets
+        self._position_family: Dict[int, str] = {}     # position ticket -> family_id (every leg)
+        self._wakeup = asyncio.Event()
+
+    # =====================================================================================
+    # 🕒 TIMERS
+    # =====================================================================================
+    def ttl_seconds(self, magic_number: int) -> float:
+        minutes = config.PENDING_ORDER_TTL_BY_MAGIC.get(magic_number, config.PENDING_ORDER_TTL_MINUTES)
+        return minutes * 60.0
+
+    def next_session_close(self, ts: float) -> Optional[float]:
+        if not config.SESSION_CLOSE_UTC:
+            return None
+
+        hours, minutes = (int(x) for x in config.SESSION_CLOSE_UTC.split(":"))
+        now = datetime.fromtimestamp(ts, tz=timezone.utc)
+        close = now.replace(hour=hours, minute=minutes, second=0, microsecond=0)
+        if close <= now:
+            close += timedelta(days=1)
+        return close.timestamp()
+
+    def _expiry_for(self, magic_number: int, placed_at: float) -> float:
+        expires_at = placed_at + self.ttl_seconds(magic_number)
+        session_close = self.next_session_close(placed_at)
+        if session_close is not None:
+            expires_at = min(expires_at, session_close)
+        return expires_at
+
+    def _schedule(self, order: PendingOrder):
+        wake = not self._heap or order.expires_at < self._heap[0][0]
+        heapq.heappush(self._heap, (order.expires_at, order.ticket))
+        if wake:
+            self._wakeup.set()
+
+    # =====================================================================================
+    # 📥 REGISTRATION
+    # =====================================================================================
+    def track_order(self, ticket: int, family_id: str, magic_number: int, symbol: str,
+                    placed_at: Optional[float] = None):
+        placed_at = self.clock() if placed_at is None else placed_at
+        order = PendingOrder(
+            ticket=ticket,
+            family_id=family_id,
+            magic=magic_number,
+            symbol=symbol,
+            expires_at=self._expiry_for(magic_number, placed_at),
+        )
+        self._orders[ticket] = order
+        self._families.setdefault(family_id, set()).add(ticket)
+        self._schedule(order)
+        logger.info(
+            f"Tracking pending order {ticket} ({family_id}), expires "
+            f"{datetime.fromtimestamp(order.expires_at).strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+
+    def track_position(self, ticket: int, family_id: str):
+        self._position_family[ticket] = family_id
+
+    def bootstrap(self):
+        """
+        One-off scan at startup so orders placed before a restart are put back on the heap.
+        """
+        if not self.mt5.connected:
+            return
+
+        now = self.clock()
+        offsets = {}
+        count = 0
+        for order in self.mt5.get_orders():
+            if order.magic > 0 and order.comment.startswith("signal_") and order.ticket not in self._orders:
+                if order.symbol not in offsets:
+                    offsets[order.symbol] = self._server_offset(order.symbol, now)
+                offset = offsets[order.symbol]
+                # time_setup is server time: bring it onto our clock (unknown offset: restart the TTL)
+                placed_at = min(order.time_setup - offset, now) if offset is not None else now
+                self.track_order(order.ticket, order.comment, order.magic, order.symbol, placed_at=placed_at)
+                count += 1
+        logger.info(f"Recovered {count} pending orders from the terminal.")
+
+    def _server_offset(self, symbol: str, now: float) -> Optional[float]:
+        """
+        Broker server time minus UTC, from the latest tick rounded to the half hour (a tick
+        up to ~15 min old still gives the right offset). None if there is no usable tick.
+        """
+        tick = self.mt5.get_tick(symbol)
+        if not tick:
+            return None
+        offset = round((tick.time - now) / SERVER_OFFSET_STEP_SECONDS) * SERVER_OFFSET_STEP_SECONDS
+        return offset if abs(offset) <= MAX_SERVER_OFFSET_SECONDS else None
+
+    def _forget(self, ticket: int) -> Optional[PendingOrder]:
+        order = self._orders.pop(ticket, None)
+        if order:
+            siblings = self._families.get(order.family_id)
+            if siblings is not None:
+                siblings.discard(ticket)
+                if not siblings:
+                    del self._families[order.family_id]
+        return order
+
+    # =====================================================================================
+    # 📊 DEAL STREAM
+    # =====================================================================================
+    def on_deals(self, deals: Optional[Iterable]):
+        if not deals:
+            return
+
+        finished_families = set()
+        for deal in deals:
+            if deal.entry == mt5.DEAL_ENTRY_IN:
+                order = self._forget(deal.order)
+                if order:
+                    logger.info(f"Pending order {deal.order} filled ({order.family_id}).")
+                    self._position_family[deal.position_id] = order.family_id
+
+            elif deal.entry == mt5.DEAL_ENTRY_OUT:
+                family_id = self._position_family.pop(deal.position_id, None)
+                if not family_id and deal.comment.startswith("signal_"):
+                    family_id = deal.comment
+                if family_id and deal.reason in (mt5.DEAL_REASON_SL, mt5.DEAL_REASON_TP):
+                    finished_families.add(family_id)
+
+        for family_id in finished_families:
+            self.cancel_family(family_id, "family stopped out / completed")
+
+    # =====================================================================================
+    # ❌ CANCELLATION
+    # =====================================================================================
+    def cancel_family(self, family_id: str, reason: str) -> int:
+        tickets = list(self._families.get(family_id, ()))
+        if not tickets:
+            return 0
+        logger.info(f"Cancelling {len(tickets)} sibling pending orders of {family_id}: {reason}")
+        return self._cancel_batch(tickets, reason)
+
+    def process_due(self, now: Optional[float] = None) -> int:
+        now = self.clock() if now is None else now
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, ticket = heapq.heappop(self._heap)
+            order = self._orders.get(ticket)
+            # Skip entries for orders that were filled, cancelled or rescheduled since
+            if order and order.expires_at == expires_at:
+                due.append(ticket)
+
+        if not due:
+            return 0
+        return self._cancel_batch(due, "expired")
+
+    def _cancel_batch(self, tickets: List[int], reason: str) -> int:
+        if not self.mt5.connected:
+            logger.warning(f"MT5 not connected, postponing cancellation of {len(tickets)} orders.")
+            self._retry(tickets)
+            return 0
+
+        cancelled = 0
+        failed = []
+        for ticket in sorted(set(tickets)):
+            if ticket not in self._orders:
+                continue
+
+            result = self.mt5.cancel_order(ticket)
+            if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+                self._forget(ticket)
+                if self.ledger:
+                    self.ledger.on_order_removed(ticket)
+                cancelled += 1
+            elif result is not None and result.retcode == mt5.TRADE_RETCODE_INVALID:
+                # Already filled, cancelled or expired on the broker side. A fill still
+                # reaches the ledger as a position through the deal stream.
+                self._forget(ticket)
+                if self.ledger:
+                    self.ledger.on_order_removed(ticket)
+            else:
+                comment = result.comment if result is not None else mt5.last_error()
+                logger.error(f"Cancel of order {ticket} failed: {comment}")
+                failed.append(ticket)
+
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} pending orders ({reason}).")
+        if failed:
+            self._retry(failed)
+        return cancelled
+
+    def _retry(self, tickets: List[int]):
+        retry_at = self.clock() + RETRY_DELAY_SECONDS
+        for ticket in tickets:
+            order = self._orders.get(ticket)
+            if not order:
+                continue
+            order.attempts += 1
+            if order.attempts > MAX_CANCEL_ATTEMPTS:
+                logger.error(f"Giving up on cancelling order {ticket} after {MAX_CANCEL_ATTEMPTS} attempts.")
+                # The order may still rest: the ledger keeps its reservation until the order
+                # history or the deal stream shows how it ended
+                self._forget(ticket)
+                continue
+            order.expires_at = retry_at
+            self._schedule(order)
+
+    # =====================================================================================
+    # 🔁 LOOP
+    # =====================================================================================
+    def seconds_until_next(self) -> float:
+        if not self._heap:
+            return MAX_SLEEP_SECONDS
+        return min(max(self._heap[0][0] - self.clock(), 0.0), MAX_SLEEP_SECONDS)
+
+    async def start_loop(self):
+        self.running = True
+        logger.info("Starting Pending Order Manager...")
+
+        while self.running:
+            try:
+                self.process_due()
+            except Exception as e:
+                logger.error(f"Error in pending order loop: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.seconds_until_next())
+            except asyncio.TimeoutError:
+                pass
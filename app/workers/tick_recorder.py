@@ -0,0 +1,53 @@
+import asyncio
+from app.config import config
+from app.log_setup import setup_logger
+from app.services.mt5_svc import MT5Service
+from app.services.recorder_svc import MarketRecorder
+
+logger = setup_logger("TickRecorderWorker")
+
+MAX_TICKS_PER_PULL = 100_000
+
+class TickRecorderWorker:
+    """
+    Pulls every tick since the last one recorded (copy_ticks_from) for RECORD_SYMBOLS
+    and appends them to the MarketRecorder in bulk. A symbol's first pull starts at its
+    current tick: tick times are broker server time, not our clock.
+    """
+
+    def __init__(self, mt5_service: MT5Service, recorder: MarketRecorder):
+        self.mt5 = mt5_service
+        self.recorder = recorder
+        self.running = False
+
+    async def start_loop(self):
+        self.running = True
+        logger.info(f"Starting Tick Recorder for {', '.join(config.RECORD_SYMBOLS)}...")
+
+        while self.running:
+            try:
+                self.pull_ticks()
+                self.recorder.flush()
+            except Exception as e:
+                logger.error(f"Error in tick recorder loop: {e}")
+
+            await asyncio.sleep(config.RECORDER_POLL_SECONDS)
+
+    def pull_ticks(self) -> int:
+        if not self.mt5.connected:
+            return 0
+
+        written = 0
+        for symbol in config.RECORD_SYMBOLS:
+            last_msc = self.recorder.last_tick_msc.get(symbol)
+            if last_msc is None:
+                tick = self.mt5.get_tick(symbol)
+                if not tick:
+                    continue
+                last_msc = tick.time_msc
+            from_ts = last_msc / 1000.0
+            ticks = self.mt5.get_ticks_from(symbol, from_ts, MAX_TICKS_PER_PULL)
+            if ticks is None:
+                continue
+            written += self.recorder.record_ticks(symbol, ticks)
+        return written
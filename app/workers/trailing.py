@@ -0,0 +1,170 @@
+import asyncio
+import time
+from app.services.mt5_api import mt5
+import numpy as np
+from app.config import config
+from app.log_setup import setup_logger
+from app.models.trailing import TrailingRule
+from app.services.mt5_svc import MT5Service
+from app.services.trailing_svc import SymbolSpec, TrailingEngine
+
+logger = setup_logger("TrailingWorker")
+
+# After a rejected request, leave the position alone for a while instead of retrying every tick
+FAILURE_COOLDOWN_SECONDS = 30.0
+
+
+def rule_for_magic(magic_number: int) -> TrailingRule:
+    # Per group: a signal family only exists once its message arrives, and always belongs to one group
+    return config.TRAILING_RULES_BY_MAGIC.get(magic_number, config.TRAILING_DEFAULT_RULE)
+
+
+class TrailingWorker:
+    """
+    Polls ticks for the symbols we hold and runs the TrailingEngine whenever a price
+    changes. Positions are reloaded on a slower cadence (TRAILING_REFRESH_SECONDS).
+    """
+
+    def __init__(self, mt5_service: MT5Service, ledger=None):
+        self.mt5 = mt5_service
+        self.ledger = ledger
+        self.engine = TrailingEngine(rule_for_magic, config.TRAILING_MIN_SL_CHANGE_POINTS)
+        self.running = False
+        self.last_refresh = 0.0
+        self.last_tick_msc = {}
+        self.cooldown_until = {}
+
+    async def start_loop(self):
+        self.running = True
+        logger.info("Starting Trailing Loop (Trailing SL + Partial Close)...")
+
+        while self.running:
+            try:
+                if time.time() - self.last_refresh >= config.TRAILING_REFRESH_SECONDS:
+                    self.refresh_positions()
+                self.on_price_update()
+            except Exception as e:
+                logger.error(f"Error in trailing loop: {e}")
+
+            await asyncio.sleep(config.TRAILING_POLL_SECONDS)
+
+    def refresh_positions(self):
+        self.last_refresh = time.time()
+        if not self.mt5.connected:
+            return
+
+        positions = [
+            p for p in self.mt5.get_positions()
+            if p.magic > 0 and p.comment.startswith("signal_")
+        ]
+
+        specs = {}
+        for symbol in {p.symbol for p in positions}:
+            info = self.mt5.get_symbol_info(symbol)
+            if info:
+                specs[symbol] = SymbolSpec(info.point, info.trade_stops_level, info.volume_min, info.volume_step)
+
+        self.engine.load(positions, specs, mt5.POSITION_TYPE_BUY)
+
+    def on_price_update(self) -> int:
+        """
+        Reads the latest tick of every symbol in the engine and, if any moved, evaluates
+        all positions at once. Returns the number of broker requests sent.
+        """
+        if not len(self.engine) or not self.mt5.connected:
+            return 0
+
+        symbols = self.engine.symbols
+        bids = np.full(len(symbols), np.nan)
+        asks = np.full(len(symbols), np.nan)
+        changed = False
+        for i, symbol in enumerate(symbols):
+            tick = self.mt5.get_tick(symbol)
+            if not tick:
+                continue
+            bids[i], asks[i] = tick.bid, tick.ask
+            if self.last_tick_msc.get(symbol) != tick.time_msc:
+                self.last_tick_msc[symbol] = tick.time_msc
+                changed = True
+
+        if not changed:
+            return 0
+
+        decision = self.engine.evaluate(bids, asks)
+        sent = 0
+
+        # Too small to split: never retry those
+        for i in decision.skip_index:
+            logger.info(
+                f"Partial close skipped for ticket {self.engine.tickets[i]}: volume {self.engine.volume[i]} too small."
+            )
+            self.engine.mark_partial_done(int(i))
+
+        for i, new_sl in zip(decision.sl_index, decision.new_sl):
+            if self._cooling_down(int(i)):
+                continue
+            sent += self._modify_sl(int(i), float(new_sl))
+
+        for i, volume in zip(decision.partial_index, decision.partial_volume):
+            if self._cooling_down(int(i)):
+                continue
+            symbol_pos = int(self.engine.sym[i])
+            sent += self._partial_close(int(i), float(volume), bids[symbol_pos], asks[symbol_pos])
+
+        return sent
+
+    def _cooling_down(self, index: int) -> bool:
+        ticket = self.engine.tickets[index]
+        until = self.cooldown_until.get(ticket)
+        if until is None:
+            return False
+        if time.time() >= until:
+            del self.cooldown_until[ticket]
+            return False
+        return True
+
+    def _modify_sl(self, index: int, new_sl: float) -> int:
+        position = self.engine.positions[index]
+        request = {
+            "action": mt5.TRADE_ACTION_SLTP,
+            "position": position.ticket,
+            "sl": new_sl,
+            "tp": float(position.tp),
+        }
+        result = self.mt5.send_order(request)
+        if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+            logger.info(f"Trailed SL of ticket {position.ticket} to {new_sl}")
+            self.engine.set_sl(index, new_sl)
+            if self.ledger:
+                self.ledger.on_sl_change(position.ticket, new_sl)
+        else:
+            comment = result.comment if result is not None else mt5.last_error()
+            logger.error(f"Trailing SL failed for ticket {position.ticket}: {comment}")
+            self.cooldown_until[position.ticket] = time.time() + FAILURE_COOLDOWN_SECONDS
+        return 1
+
+    def _partial_close(self, index: int, volume: float, bid: float, ask: float) -> int:
+        position = self.engine.positions[index]
+        is_buy = position.type == mt5.POSITION_TYPE_BUY
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": position.symbol,
+            "volume": volume,
+            "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+            "position": position.ticket,
+            "price": float(bid if is_buy else ask),
+            "deviation": 20,
+            "magic": position.magic,
+            "comment": position.comment,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_FOK,
+        }
+        result = self.mt5.send_order(request)
+        if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+            logger.info(f"Partially closed {volume} lots of ticket {position.ticket}")
+            self.engine.mark_partial_done(index, volume)
+        else:
+            comment = result.comment if result is not None else mt5.last_error()
+            logger.error(f"Partial close failed for ticket {position.ticket}: {comment}")
+            self.cooldown_until[position.ticket] = time.time() + FAILURE_COOLDOWN_SECONDS
+        return 1
@@ -1,12 +1,16 @@
 import asyncio
 import sys
+import time
 from app.config import config
 from app.log_setup import setup_logger
+from app.models.signal import TradeSignal
+from app.pipeline.runtime import ExecutionStack, LatencyTracker, is_stale, looks_like_signal, replay_journal, watchdog_tasks
 from app.services.telegram_svc import TelegramBot
 from app.services.ai_parser_svc import AIService
-from app.services.mt5_svc import MT5Service
-from app.services.trade_executor import TradeExecutor
-from app.workers.monitor import MonitorWorker
+from app.services.journal_svc import SignalJournal
+from app.services.recorder_svc import (
+    EVENT_SIGNAL_PARSED, EVENT_SIGNAL_RECEIVED, EVENT_SIGNAL_SKIPPED, SKIP_NOT_A_SIGNAL, SKIP_STALE
+)
 
 logger = setup_logger("Main")
 
@@ -15,66 +19,110 @@ async def main():
 
     # 1. Initialize Services
     ai_service = AIService()
-    mt5_service = MT5Service()
-    
-    # Connect to MT5 immediately
-    if not mt5_service.connect():
+    journal = SignalJournal()
+    journal.load()
+
+    stack = ExecutionStack(journal)
+    if not stack.start():
         logger.critical("Failed to connect to MT5. Exiting.")
         return
 
-    trade_executor = TradeExecutor(mt5_service)
-    monitor_worker = MonitorWorker(trade_executor)
+    trade_executor = stack.executor
+    latency = LatencyTracker("single-process")
     
     # 2. Define the pipeline (Orchestration)
-    async def pipeline(text: str, magic_number: int):
+    async def pipeline(text: str, magic_number: int, chat_id: int = None, message_id: int = None,
+                       sent_at: float = None, replay: bool = False, signal: TradeSignal = None):
         """
         Callback function triggered by new Telegram messages.
+        Also used on startup to replay journaled messages that were not fully handled
+        (replay=True, with the already parsed signal if there is one).
         """
         logger.info(f"Pipeline triggered for group {magic_number}")
-        
-        # Simple Keyword Filter
-        FULL_KEYWORDS = [
-            "BUY", "SELL", "LIMIT", "STOP", "TP", "SL", "XAU", "GOLD",
-            "ENTRY", "EXECUTE", "CLOSE", "MODIFY", "UPDATE", "MOVE", "BE", "OPEN", "RISK",
-            "TAKE PROFIT", "STOP LOSS", "PENDING", "INSTANT", "PIP", "PIPS", "POINT", "POINTS",
-            "EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "US30", "DOW", "NAS100", "NASDAQ",
-            "BTC", "ETH", "OIL", "CRUDE"
-        ]
-        
-        # Convert text to uppercase for checking
-        text_upper = text.upper()
+        received_ns = time.time_ns()
+
+        def record(kind: int, **fields):
+            stack.record(kind, magic=magic_number, ref_id=message_id, **fields)
+
+        journaled = message_id is not None
+        if journaled and not replay:
+            if journal.is_seen(chat_id, message_id):
+                logger.info(f"Ignored message {message_id}: already handled.")
+                return
+            journal.record_message(chat_id, message_id, magic_number, text, sent_at)
+
+        if not replay:
+            # After the dedupe: catch-up and duplicate deliveries are not received twice
+            record(EVENT_SIGNAL_RECEIVED)
+
+        if journaled and is_stale(sent_at):
+            logger.warning(f"SKIPPED: Message {message_id} is {int(time.time() - sent_at)}s old.")
+            journal.finish(chat_id, message_id, "stale")
+            record(EVENT_SIGNAL_SKIPPED, code=SKIP_STALE)
+            return
 
-        # Only send to AI if at least 2 keywords are present
-        if sum(1 for word in FULL_KEYWORDS if word in text_upper) < 2:
+        if signal is not None:
+            trade_executor.execute_signal(
+                signal, magic_number, journal.family_id_for(magic_number, message_id), message_id
+            )
+            journal.finish(chat_id, message_id)
+            return
+
+        if not looks_like_signal(text):
             logger.info("Ignored message (No trading keywords found).")
+            if journaled:
+                journal.finish(chat_id, message_id, "ignored")
             return
 
         # A. Parse with AI
         signal = await ai_service.parse_signal(text)
+        if journaled:
+            journal.record_signal(chat_id, message_id, signal)
+        if signal:
+            record(EVENT_SIGNAL_PARSED, symbol=signal.symbol)
+        else:
+            record(EVENT_SIGNAL_SKIPPED, code=SKIP_NOT_A_SIGNAL)
         
         # B. Execute if valid
         if signal:
             # We run this synchronously (blocking the event loop slightly) or offload it.
             # Since MT5 python library is blocking, we might want to run it in an executor if high volume.
             # For now, direct call is fine as per original design.
-            trade_executor.execute_signal(signal, magic_number)
+            family_id = journal.family_id_for(magic_number, message_id) if journaled else None
+            trade_executor.execute_signal(signal, magic_number, family_id, message_id)
+            latency.observe(received_ns)
+
+        if journaled:
+            journal.finish(chat_id, message_id)
+
+    # Replay messages that were interrupted by a crash / restart
+    async def replay(message: dict, signal: TradeSignal):
+        await pipeline(
+            message["text"], message["magic"], message["chat_id"], message["message_id"],
+            message.get("sent_at") or message["t"], replay=True, signal=signal
+        )
+
+    await replay_journal(journal, replay)
 
     # 3. Initialize Telegram Bot with the pipeline callback
-    bot = TelegramBot(callback=pipeline)
+    bot = TelegramBot(callback=pipeline, journal=journal)
     
     # 4. Run everything
     try:
-        await asyncio.gather(
-            bot.start(),
-            monitor_worker.start_loop()
-        )
+        await asyncio.gather(bot.start(), *stack.tasks(), *watchdog_tasks("main"))
     except KeyboardInterrupt:
         logger.info("Stopping bot...")
     finally:
-        mt5_service.shutdown()
+        stack.close()
 
 if __name__ == "__main__":
+    if config.PIPELINE_MODE == "multi":
+        # Ingestion, parsing and execution in separate supervised processes
+        from app.pipeline.supervisor import run_supervisor
+        run_supervisor()
+        sys.exit(0)
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read at import time: required fields and the live broker, whose
+# MetaTrader5 package is replaced by the fake
+for key, value in dict(
+    API_ID="1", API_HASH="test", PHONE="0", MT5_LOGIN="1", MT5_PASSWORD="test", MT5_SERVER="test",
+    OPENROUTER_API_KEY="test", BROKER_MODE="live",
+).items():
+    os.environ[key] = value
+
+from tests.fake_mt5 import FakeMetaTrader5  # noqa: E402
+
+sys.modules["MetaTrader5"] = FakeMetaTrader5()
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def mt5():
+    fake = sys.modules["MetaTrader5"]
+    fake.reset()
+    return fake
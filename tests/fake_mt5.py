@@ -0,0 +1,37 @@
+"""
+Stand-in for the MetaTrader5 package (Windows only): the package's constants plus the
+calls the bot makes, answering from in-memory state the test sets up.
+"""
+import types
+from types import SimpleNamespace
+from app.paper.constants import MT5Constants
+
+
+class FakeMetaTrader5(types.ModuleType):
+    def __init__(self):
+        super().__init__("MetaTrader5")
+        for name in dir(MT5Constants):
+            if name.isupper():
+                setattr(self, name, getattr(MT5Constants, name))
+        self.reset()
+
+    def reset(self):
+        self.orders = []      # what orders_get() returns
+        self.ticks = {}       # symbol -> tick returned by symbol_info_tick()
+        self.retcodes = {}    # ticket -> retcodes order_send() answers with, in turn (default DONE)
+        self.requests = []    # every order_send() request
+
+    def orders_get(self, symbol: str = None, **kwargs):
+        return tuple(o for o in self.orders if symbol is None or o.symbol == symbol)
+
+    def symbol_info_tick(self, symbol: str):
+        return self.ticks.get(symbol)
+
+    def order_send(self, request: dict):
+        self.requests.append(request)
+        scripted = self.retcodes.get(request.get("order"))
+        retcode = scripted.pop(0) if scripted else self.TRADE_RETCODE_DONE
+        return SimpleNamespace(retcode=retcode, order=request.get("order"), comment=f"retcode {retcode}")
+
+    def last_error(self):
+        return (1, "Success")
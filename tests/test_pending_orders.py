@@ -0,0 +1,239 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from app.config import config
+from app.services.mt5_svc import MT5Service
+from app.workers.pending_orders import MAX_CANCEL_ATTEMPTS, RETRY_DELAY_SECONDS, PendingOrderManager
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc).timestamp()
+HOUR = 3600.0
+
+
+class Clock:
+    def __init__(self, now: float = NOW):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Ledger:
+    def __init__(self):
+        self.removed = []
+
+    def on_order_removed(self, ticket: int):
+        self.removed.append(ticket)
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(config, "PENDING_ORDER_TTL_MINUTES", 240)
+    monkeypatch.setattr(config, "PENDING_ORDER_TTL_BY_MAGIC", {})
+    monkeypatch.setattr(config, "SESSION_CLOSE_UTC", None)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def ledger():
+    return Ledger()
+
+
+@pytest.fixture
+def manager(mt5, clock, ledger):
+    service = MT5Service()
+    service.connected = True
+    return PendingOrderManager(service, clock=clock, ledger=ledger)
+
+
+def deal(entry, position_id, reason, order=0, comment=""):
+    return SimpleNamespace(entry=entry, position_id=position_id, reason=reason, order=order, comment=comment)
+
+
+def cancelled(mt5):
+    return [request["order"] for request in mt5.requests if request["action"] == mt5.TRADE_ACTION_REMOVE]
+
+
+# =====================================================================================
+# 🕒 TIMERS
+# =====================================================================================
+def test_order_is_cancelled_when_its_ttl_runs_out(manager, mt5, ledger):
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+
+    assert manager.process_due(NOW + 4 * HOUR - 1) == 0
+    assert cancelled(mt5) == []
+
+    assert manager.process_due(NOW + 4 * HOUR) == 1
+    assert cancelled(mt5) == [1]
+    assert ledger.removed == [1]
+    assert manager.seconds_until_next() > 0  # nothing left on the heap
+
+
+def test_ttl_is_overridden_per_group(manager, mt5, monkeypatch):
+    monkeypatch.setattr(config, "PENDING_ORDER_TTL_BY_MAGIC", {1004: 30})
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+    manager.track_order(2, "signal_1004_1", 1004, "XAUUSD")
+
+    assert manager.process_due(NOW + 30 * 60) == 1
+    assert cancelled(mt5) == [2]
+
+
+def test_expiry_is_capped_at_session_close(manager, mt5, monkeypatch):
+    monkeypatch.setattr(config, "SESSION_CLOSE_UTC", "14:00")
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+
+    assert manager._orders[1].expires_at == NOW + 2 * HOUR
+    assert manager.process_due(NOW + 2 * HOUR) == 1
+    assert cancelled(mt5) == [1]
+
+
+def test_session_close_after_the_ttl_does_not_change_the_expiry(manager, monkeypatch):
+    monkeypatch.setattr(config, "SESSION_CLOSE_UTC", "21:00")
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+
+    assert manager._orders[1].expires_at == NOW + 4 * HOUR
+
+
+def test_session_close_already_passed_today_applies_tomorrow(manager, monkeypatch):
+    monkeypatch.setattr(config, "SESSION_CLOSE_UTC", "11:00")
+
+    assert manager.next_session_close(NOW) == NOW + 23 * HOUR
+
+
+# =====================================================================================
+# 📊 DEAL STREAM
+# =====================================================================================
+def test_sl_close_cancels_the_family_siblings(manager, mt5, ledger):
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+    manager.track_order(2, "signal_1001_1", 1001, "XAUUSD")
+    manager.track_order(3, "signal_1001_2", 1001, "XAUUSD")
+    manager.track_position(100, "signal_1001_1")
+
+    manager.on_deals([deal(mt5.DEAL_ENTRY_OUT, 100, mt5.DEAL_REASON_SL)])
+
+    assert sorted(cancelled(mt5)) == [1, 2]
+    assert sorted(ledger.removed) == [1, 2]
+    assert list(manager._orders) == [3]
+
+
+def test_tp_close_of_a_filled_pending_leg_cancels_its_siblings(manager, mt5):
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+    manager.track_order(2, "signal_1001_1", 1001, "XAUUSD")
+
+    # Order 1 fills into position 200, which later hits its TP
+    manager.on_deals([deal(mt5.DEAL_ENTRY_IN, 200, mt5.DEAL_REASON_EXPERT, order=1)])
+    manager.on_deals([deal(mt5.DEAL_ENTRY_OUT, 200, mt5.DEAL_REASON_TP)])
+
+    assert cancelled(mt5) == [2]
+    assert manager._orders == {}
+
+
+def test_manual_close_keeps_the_siblings(manager, mt5):
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+    manager.track_position(100, "signal_1001_1")
+
+    manager.on_deals([deal(mt5.DEAL_ENTRY_OUT, 100, mt5.DEAL_REASON_EXPERT, comment="signal_1001_1")])
+
+    assert cancelled(mt5) == []
+    assert list(manager._orders) == [1]
+
+
+# =====================================================================================
+# ❌ CANCELLATION
+# =====================================================================================
+def test_invalid_retcode_forgets_the_order_without_retrying(manager, mt5, ledger, clock):
+    mt5.retcodes[1] = [mt5.TRADE_RETCODE_INVALID]
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+
+    assert manager.process_due(NOW + 4 * HOUR) == 0
+    assert manager._orders == {}
+    assert ledger.removed == [1]
+
+    clock.now = NOW + 5 * HOUR
+    assert manager.process_due() == 0
+    assert cancelled(mt5) == [1]
+
+
+def test_failed_cancel_is_retried(manager, mt5, ledger, clock):
+    mt5.retcodes[1] = [mt5.TRADE_RETCODE_REJECT]
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+
+    clock.now = NOW + 4 * HOUR
+    assert manager.process_due() == 0
+    assert manager._orders[1].attempts == 1
+    assert manager.process_due(clock.now + RETRY_DELAY_SECONDS - 1) == 0
+
+    assert manager.process_due(clock.now + RETRY_DELAY_SECONDS) == 1
+    assert cancelled(mt5) == [1, 1]
+    assert ledger.removed == [1]
+
+
+def test_cancel_is_given_up_after_max_attempts(manager, mt5, ledger, clock):
+    mt5.retcodes[1] = [mt5.TRADE_RETCODE_REJECT] * (MAX_CANCEL_ATTEMPTS + 1)
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+
+    clock.now = NOW + 4 * HOUR
+    for _ in range(MAX_CANCEL_ATTEMPTS + 1):
+        manager.process_due()
+        clock.now += RETRY_DELAY_SECONDS
+
+    assert len(cancelled(mt5)) == MAX_CANCEL_ATTEMPTS + 1
+    assert manager._orders == {}
+    # The order may still rest: its reservation is left to the order history
+    assert ledger.removed == []
+
+    manager.process_due(clock.now + HOUR)
+    assert len(cancelled(mt5)) == MAX_CANCEL_ATTEMPTS + 1
+
+
+def test_cancel_is_postponed_while_disconnected(manager, mt5, clock):
+    manager.track_order(1, "signal_1001_1", 1001, "XAUUSD")
+    manager.mt5.connected = False
+
+    clock.now = NOW + 4 * HOUR
+    assert manager.process_due() == 0
+    assert cancelled(mt5) == []
+
+    manager.mt5.connected = True
+    assert manager.process_due(clock.now + RETRY_DELAY_SECONDS) == 1
+
+
+# =====================================================================================
+# 🔁 BOOTSTRAP
+# =====================================================================================
+def order(ticket, time_setup, magic=1001, comment="signal_1001_1"):
+    return SimpleNamespace(ticket=ticket, magic=magic, comment=comment, symbol="XAUUSD", time_setup=int(time_setup))
+
+
+@pytest.mark.parametrize("server_offset", [0, 2 * HOUR, 3 * HOUR, -5 * HOUR])
+def test_bootstrap_converts_setup_time_from_server_time(manager, mt5, server_offset):
+    # Placed an hour ago; the latest tick is 40s old
+    mt5.orders = [order(1, NOW - HOUR + server_offset)]
+    mt5.ticks["XAUUSD"] = SimpleNamespace(time=int(NOW + server_offset - 40))
+
+    manager.bootstrap()
+
+    assert manager._orders[1].expires_at == NOW + 3 * HOUR
+
+
+@pytest.mark.parametrize("tick", [None, SimpleNamespace(time=int(NOW - 2 * 24 * HOUR))])
+def test_bootstrap_restarts_the_ttl_without_a_usable_tick(manager, mt5, tick):
+    mt5.orders = [order(1, NOW - HOUR + 3 * HOUR)]
+    if tick:
+        mt5.ticks["XAUUSD"] = tick
+
+    manager.bootstrap()
+
+    assert manager._orders[1].expires_at == NOW + 4 * HOUR
+
+
+def test_bootstrap_only_recovers_bot_orders(manager, mt5):
+    mt5.orders = [order(1, NOW), order(2, NOW, magic=0), order(3, NOW, comment="manual")]
+    mt5.ticks["XAUUSD"] = SimpleNamespace(time=int(NOW))
+
+    manager.bootstrap()
+
+    assert list(manager._orders) == [1]